@@ -0,0 +1,5 @@
+"""Python bindings for the libir_system.so search engine."""
+from ir_system.index import Index
+from ir_system._native import get_native
+
+__all__ = ["Index", "get_native"]
@@ -0,0 +1,35 @@
+"""Builds the cffi API-mode extension ``ir_system._native_ext``.
+
+Run after compiling libir_system.so into the project root:
+
+    python3 -m ir_system._build_native
+"""
+import os
+import shutil
+import tempfile
+
+from cffi import FFI
+
+from ir_system._cdef import CDEF, HEADERS
+
+package_dir = os.path.abspath(os.path.dirname(__file__))
+project_root = os.path.abspath(os.path.join(package_dir, '..'))
+src_dir = os.path.join(project_root, "src")
+
+ffibuilder = FFI()
+ffibuilder.cdef(CDEF)
+ffibuilder.set_source(
+    "ir_system._native_ext",
+    "\n".join(f'#include "{header}"' for header in HEADERS),
+    source_extension=".cpp",
+    include_dirs=[src_dir],
+    libraries=["ir_system"],
+    library_dirs=[project_root],
+    extra_link_args=[f"-Wl,-rpath,{project_root}"],
+)
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as build_dir:
+        module_path = ffibuilder.compile(tmpdir=build_dir, verbose=True)
+        shutil.copy(module_path, package_dir)
+    print(f"Built {os.path.basename(module_path)} in {package_dir}")
@@ -0,0 +1,70 @@
+# C declarations of the libir_system.so functions used from Python. Shared by
+# the API-mode extension builder and the ABI-mode fallback loader.
+CDEF = """
+struct DocListNode {
+    int doc_id;
+    struct DocListNode* next;
+};
+
+struct BatchSearchResults {
+    int query_count;
+    long long* offsets;
+    int* doc_ids;
+};
+
+struct SuggestionNode {
+    char* term;
+    char* surface;
+    int distance;
+    int doc_freq;
+    struct SuggestionNode* next;
+};
+
+void init_inverted_index(void);
+void cleanup_inverted_index(void);
+void print_inverted_index(void);
+void set_normalization_flags(int flags);
+int get_normalization_flags(void);
+void build_index_for_document(const char* text, int doc_id);
+void build_index_for_document_with_zipf(const char* text, int doc_id);
+
+struct DocListNode* boolean_search(const char* query);
+void free_doc_list(struct DocListNode* head);
+int* boolean_search_array(const char* query, int* count);
+void free_doc_ids(int* doc_ids);
+struct BatchSearchResults* boolean_search_batch(const char** queries, int query_count, int num_threads);
+void free_batch_results(struct BatchSearchResults* results);
+
+void build_term_dictionary(void);
+int get_term_dictionary_size(void);
+void set_max_wildcard_expansions(int max_expansions);
+struct SuggestionNode* suggest_terms(const char* word, int max_distance, int max_suggestions);
+void free_suggestion_list(struct SuggestionNode* head);
+
+int external_index_open_writer(const char* path, long long memory_budget);
+int external_index_close_writer(void);
+void external_index_abort_writer(void);
+int external_index_run_count(void);
+int load_external_index(const char* path);
+
+int doc_store_open_writer(const char* path);
+void doc_store_close_writer(void);
+int doc_store_open(const char* path);
+void doc_store_close(void);
+char* get_snippet(const char* query, int doc_id, int max_length, const char* open_tag, const char* close_tag);
+void free_snippet(char* snippet);
+
+void init_hash_table(void);
+void save_zipf_analysis(const char* filename);
+"""
+
+HEADERS = [
+    "tokenizer.h",
+    "boolean_index.h",
+    "batch_search.h",
+    "term_dictionary.h",
+    "external_index.h",
+    "doc_store.h",
+    "index_builder.h",
+    "zipf_analyzer.h",
+]
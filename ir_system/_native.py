@@ -0,0 +1,37 @@
+"""Lazy access to the native search library.
+
+The compiled cffi extension (API mode) is preferred: its calls go through
+generated C wrappers without ctypes-style argument marshalling. When it has
+not been built, libir_system.so is opened in cffi ABI mode instead.
+"""
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+default_lib_path = os.path.join(project_root, "libir_system.so")
+
+_ffi = None
+_lib = None
+
+
+def get_native():
+    """Returns the ``(ffi, lib)`` pair, loading the library on first use."""
+    global _ffi, _lib
+    if _lib is not None:
+        return _ffi, _lib
+
+    try:
+        from ir_system._native_ext import ffi, lib
+    except ImportError:
+        from cffi import FFI
+        from ir_system._cdef import CDEF
+
+        lib_path = os.environ.get("IR_SYSTEM_LIB", default_lib_path)
+        ffi = FFI()
+        ffi.cdef(CDEF)
+        try:
+            lib = ffi.dlopen(lib_path)
+        except OSError as e:
+            raise OSError(f"Could not load libir_system.so: {e}. Make sure it's compiled and in the project root.") from e
+
+    _ffi, _lib = ffi, lib
+    return _ffi, _lib
@@ -0,0 +1,164 @@
+from ir_system._native import get_native
+
+# Mirrors the NORMALIZE_* flags of src/tokenizer.h.
+NORMALIZE_CASE_FOLD = 1
+NORMALIZE_STRIP_DIACRITICS = 2
+NORMALIZE_STEM_ENGLISH = 4
+NORMALIZE_STEM_RUSSIAN = 8
+
+
+class Index:
+    """Handle for the inverted index held by libir_system.so.
+
+    The native library keeps a single process-wide index, so only one
+    ``Index`` may be open at a time. Closing it frees the C++ memory.
+    """
+
+    _open_instance = None
+
+    def __init__(self):
+        if Index._open_instance is not None:
+            raise RuntimeError("Another Index is already open; close it first.")
+        self._ffi, self._lib = get_native()
+        self._lib.init_inverted_index()
+        self._closed = False
+        Index._open_instance = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._lib.external_index_abort_writer()
+        self._lib.doc_store_close_writer()
+        self._lib.doc_store_close()
+        self._lib.cleanup_inverted_index()
+        self._closed = True
+        Index._open_instance = None
+
+    def set_normalization(self, case_fold=True, strip_diacritics=False, stem_english=True, stem_russian=True):
+        """Selects how tokens and query terms are normalized.
+
+        Applies to documents added afterwards and to every query, so set it
+        before indexing and keep it while the index is searched.
+        """
+        flags = ((NORMALIZE_CASE_FOLD if case_fold else 0)
+                 | (NORMALIZE_STRIP_DIACRITICS if strip_diacritics else 0)
+                 | (NORMALIZE_STEM_ENGLISH if stem_english else 0)
+                 | (NORMALIZE_STEM_RUSSIAN if stem_russian else 0))
+        self._lib.set_normalization_flags(flags)
+
+    def add_document(self, doc_id, text, with_zipf=False):
+        content_bytes = text.encode('utf-8')
+        if with_zipf:
+            self._lib.build_index_for_document_with_zipf(content_bytes, doc_id)
+        else:
+            self._lib.build_index_for_document(content_bytes, doc_id)
+
+    def search(self, query):
+        count = self._ffi.new("int*")
+        doc_ids_ptr = self._lib.boolean_search_array(query.encode('utf-8'), count)
+        if doc_ids_ptr == self._ffi.NULL:
+            return []
+        doc_ids = self._ffi.unpack(doc_ids_ptr, count[0])
+        self._lib.free_doc_ids(doc_ids_ptr)
+        return doc_ids
+
+    def search_batch(self, queries, num_threads=0):
+        """Evaluates many queries in one native call.
+
+        Queries run in parallel on ``num_threads`` threads (0 uses every
+        core) and terms shared between queries are resolved only once.
+        Returns one list of doc ids per query, in the order given.
+        """
+        query_buffers = [self._ffi.new("char[]", query.encode('utf-8')) for query in queries]
+        query_array = self._ffi.new("const char*[]", query_buffers)
+        results = self._lib.boolean_search_batch(query_array, len(query_buffers), num_threads)
+        try:
+            offsets = self._ffi.unpack(results.offsets, results.query_count + 1)
+            return [self._ffi.unpack(results.doc_ids + offsets[i], offsets[i + 1] - offsets[i])
+                    for i in range(results.query_count)]
+        finally:
+            self._lib.free_batch_results(results)
+
+    def suggest(self, word, max_distance=2, max_suggestions=5):
+        suggestion_list_ptr = self._lib.suggest_terms(word.encode('utf-8'), max_distance, max_suggestions)
+        suggestions = []
+        current_node = suggestion_list_ptr
+        while current_node != self._ffi.NULL:
+            suggestions.append({"term": self._ffi.string(current_node.term).decode('utf-8'),
+                                "surface": self._ffi.string(current_node.surface).decode('utf-8'),
+                                "distance": current_node.distance,
+                                "doc_freq": current_node.doc_freq})
+            current_node = current_node.next
+        self._lib.free_suggestion_list(suggestion_list_ptr)
+        return suggestions
+
+    def set_max_wildcard_expansions(self, max_expansions):
+        self._lib.set_max_wildcard_expansions(max_expansions)
+
+    def build_term_dictionary(self):
+        """Builds the sorted term dictionary used by wildcard and fuzzy queries.
+
+        It is otherwise built by the first query that needs it; servers should
+        call this once indexing is done so no request pays for the build.
+        """
+        self._lib.build_term_dictionary()
+
+    def term_count(self):
+        return self._lib.get_term_dictionary_size()
+
+    def print_contents(self):
+        self._lib.print_inverted_index()
+
+    def open_index_writer(self, path, memory_budget_mb=256):
+        """Starts an external-memory build of an on-disk index at ``path``.
+
+        Until close_index_writer is called, add_document collects postings
+        in memory up to ``memory_budget_mb`` and spills them to sorted runs
+        next to ``path`` instead of filling this index. Doc ids must increase.
+        """
+        return bool(self._lib.external_index_open_writer(path.encode('utf-8'), int(memory_budget_mb * 1024 * 1024)))
+
+    def close_index_writer(self):
+        """Merges the runs into the final index file, returns its term count or -1."""
+        return self._lib.external_index_close_writer()
+
+    def abort_index_writer(self):
+        """Discards an unfinished build; its runs are deleted and ``path`` is left as it was."""
+        self._lib.external_index_abort_writer()
+
+    def index_run_count(self):
+        return self._lib.external_index_run_count()
+
+    def load_index(self, path):
+        """Loads an on-disk index built by open_index_writer, returns its term count or -1."""
+        return self._lib.load_external_index(path.encode('utf-8'))
+
+    def open_doc_store_writer(self, path):
+        return bool(self._lib.doc_store_open_writer(path.encode('utf-8')))
+
+    def close_doc_store_writer(self):
+        self._lib.doc_store_close_writer()
+
+    def open_doc_store(self, path):
+        return bool(self._lib.doc_store_open(path.encode('utf-8')))
+
+    def snippet(self, query, doc_id, max_length=240, open_tag="[", close_tag="]"):
+        snippet_ptr = self._lib.get_snippet(query.encode('utf-8'), doc_id, max_length,
+                                            open_tag.encode('utf-8'), close_tag.encode('utf-8'))
+        if snippet_ptr == self._ffi.NULL:
+            return None
+        snippet = self._ffi.string(snippet_ptr).decode('utf-8', errors='replace')
+        self._lib.free_snippet(snippet_ptr)
+        return snippet
+
+    def reset_zipf(self):
+        self._lib.init_hash_table()
+
+    def save_zipf(self, csv_path):
+        self._lib.save_zipf_analysis(csv_path.encode('utf-8'))
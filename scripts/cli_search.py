@@ -1,77 +1,94 @@
 import pymongo
+import argparse
 import json
 import os
-from ctypes import cdll, c_char_p, c_int, c_void_p, Structure, POINTER, cast
+import sys
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-lib_path = os.path.join(project_root, "libir_system.so")
+data_dir = os.path.join(project_root, "data")
+doc_store_path = os.path.join(data_dir, "doc_store.bin")
 
-try:
-    lib = cdll.LoadLibrary(lib_path)
-except OSError as e:
-    print(f"Error: Could not load libir_system.so: {e}. Make sure it's compiled and in the project root.")
-    exit(1)
+os.makedirs(data_dir, exist_ok=True)
 
-lib.init_inverted_index.argtypes = []
-lib.init_inverted_index.restype = None
+sys.path.insert(0, project_root)
+from ir_system import Index
 
-lib.build_index_for_document_with_zipf.argtypes = [c_char_p, c_int]
-lib.build_index_for_document_with_zipf.restype = None
-
-lib.build_index_for_document.argtypes = [c_char_p, c_int]
-lib.build_index_for_document.restype = None
-
-lib.cleanup_inverted_index.argtypes = []
-lib.cleanup_inverted_index.restype = None
-
-lib.print_inverted_index.argtypes = []
-lib.print_inverted_index.restype = None
-
-lib.boolean_search.argtypes = [c_char_p]
-lib.boolean_search.restype = c_void_p
-
-lib.free_doc_list.argtypes = [c_void_p]
-lib.free_doc_list.restype = None
-
-lib.init_hash_table.argtypes = []
-lib.init_hash_table.restype = None
-
-def parse_doc_list(doc_list_ptr):
-    results = []
-    class DocListNode(Structure):
-        _fields_ = [("doc_id", c_int),
-                    ("next", c_void_p)]
-    
-    current_node = cast(doc_list_ptr, POINTER(DocListNode))
-    while current_node and current_node.contents.doc_id >= 0:
-        results.append(current_node.contents.doc_id)
-        current_node = cast(current_node.contents.next, POINTER(DocListNode))
-    return results
+SNIPPET_LENGTH = 200
+MAX_SNIPPETS = 10
+BATCH_SIZE = 10000
 
 MONGO_URI = "mongodb://localhost:27017/"
 DATABASE_NAME = "ir_system"
 COLLECTION_NAME = "documents"
 
-def cli_search_interface():
+def read_query_batches(queries_file, batch_size):
+    batch = []
+    for line in queries_file:
+        query = line.rstrip("\n")
+        if not query.strip():
+            continue
+        batch.append(query)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def batch_search(index, queries_path, output_path, num_threads, batch_size):
+    output = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    total_queries = 0
+    try:
+        with open(queries_path, encoding="utf-8") as queries_file:
+            for batch in read_query_batches(queries_file, batch_size):
+                for query, doc_ids in zip(batch, index.search_batch(batch, num_threads)):
+                    output.write(json.dumps({"query": query, "doc_ids": doc_ids}, ensure_ascii=False) + "\n")
+                output.flush()
+                total_queries += len(batch)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Processed {total_queries} queries.", file=sys.stderr)
+
+def cli_search_interface(args):
     client = None
+    index = None
+    # In batch mode results may go to stdout, so status messages go to stderr.
+    log = sys.stderr if args.queries else sys.stdout
     try:
         client = pymongo.MongoClient(MONGO_URI)
         db = client[DATABASE_NAME]
         collection = db[COLLECTION_NAME]
 
-        lib.init_inverted_index()
-        print("C++ Inverted Index Initialized.")
+        index = Index()
+        print("C++ Inverted Index Initialized.", file=log)
+        if args.index:
+            # Prebuilt by build_index.py together with the document store,
+            # so only titles and URLs are read from MongoDB.
+            if index.load_index(args.index) < 0:
+                return
+            documents_cursor = collection.find({}, {"title": 1, "url": 1})
+        else:
+            if not args.queries:
+                index.open_doc_store_writer(doc_store_path)
+            documents_cursor = collection.find({})
 
-        documents_cursor = collection.find({})
         doc_map = {}
         for doc_id, document in enumerate(documents_cursor):
             doc_map[doc_id] = {"title": document.get("title", "N/A"), "url": document.get("url", "N/A")}
             if "content" in document:
-                content_bytes = document["content"].encode('utf-8')
-                lib.build_index_for_document(content_bytes, doc_id)
-        
+                index.add_document(doc_id, document["content"])
+
+        if args.queries:
+            print(f"Index built with {len(doc_map)} documents. Running queries from {args.queries}...", file=log)
+            batch_search(index, args.queries, args.output, args.threads, args.batch_size)
+            return
+
+        index.close_doc_store_writer()
+        if not index.open_doc_store(doc_store_path):
+            print("Document store is unavailable, results will be shown without snippets.")
+
         print("Index built. Ready for queries.")
-        print("Supported logic: implicit AND (e.g., \"word1 word2\"), explicit NOT (e.g., \"word1 NOT word2\" or \"word1 -word2\").")
+        print("Supported logic: implicit AND (e.g., \"word1 word2\"), explicit NOT (e.g., \"word1 NOT word2\" or \"word1 -word2\"), wildcards (e.g., \"philosoph*\" or \"*ology\"), fuzzy terms (e.g., \"philosofy~\" or \"bok~1\").")
 
         while True:
             query = input("Enter search query (or 'q' to quit): ")
@@ -80,36 +97,39 @@ def cli_search_interface():
             if not query.strip():
                 continue
 
-            query_bytes = query.encode('utf-8')
-            result_list_ptr = lib.boolean_search(query_bytes)
-            
-            if not result_list_ptr:
-                search_results_ids = []
-            else:
-                search_results_ids = parse_doc_list(result_list_ptr)
-                lib.free_doc_list(result_list_ptr)
+            search_results_ids = index.search(query)
 
             if not search_results_ids:
                 print("No documents found for your query.")
             else:
                 print(f"Found {len(search_results_ids)} documents:")
-                for doc_id in search_results_ids:
+                for rank, doc_id in enumerate(search_results_ids):
                     doc_info = doc_map.get(doc_id, {"title": "N/A", "url": "N/A"})
                     print(f"  Document ID: {doc_id}")
                     print(f"    Title: {doc_info['title']}")
                     print(f"    URL: {doc_info['url']}")
+                    snippet = index.snippet(query, doc_id, SNIPPET_LENGTH, "\033[1m", "\033[0m") if rank < MAX_SNIPPETS else None
+                    if snippet:
+                        print(f"    Snippet: {snippet}")
                     print("---------------------------------------------------")
             print("\n")
 
     except pymongo.errors.ConnectionFailure as e:
-        print(f"Could not connect to MongoDB: {e}. Please ensure MongoDB is running.")
+        print(f"Could not connect to MongoDB: {e}. Please ensure MongoDB is running.", file=log)
     except Exception as e:
-        print(f"An error occurred: {e}")
+        print(f"An error occurred: {e}", file=log)
     finally:
         if client:
             client.close()
-        lib.cleanup_inverted_index()
-        print("C++ Inverted Index memory cleaned up.")
+        if index:
+            index.close()
+            print("C++ Inverted Index memory cleaned up.", file=log)
 
 if __name__ == "__main__":
-    cli_search_interface()
+    parser = argparse.ArgumentParser(description="Interactive or batch boolean search over the MongoDB collection.")
+    parser.add_argument("--index", help="load the on-disk index built by build_index.py instead of indexing the collection")
+    parser.add_argument("--queries", help="file with one query per line; runs them in batch mode instead of the interactive prompt")
+    parser.add_argument("--output", default="-", help="where batch mode writes JSON lines results (default: stdout)")
+    parser.add_argument("--threads", type=int, default=0, help="worker threads for batch mode (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="queries evaluated per native call in batch mode")
+    cli_search_interface(parser.parse_args())
@@ -1,76 +1,78 @@
-from flask import Flask, render_template, request
+from flask import Flask, render_template, request, jsonify
 import pymongo
 import json
 import os
-from ctypes import cdll, c_char_p, c_int, c_void_p, Structure, POINTER, cast
+import sys
+from markupsafe import Markup, escape
 
 app = Flask(__name__, template_folder=os.path.abspath(os.path.join(os.path.dirname(__file__), 'templates')))
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-lib_path = os.path.join(project_root, "libir_system.so")
-
-try:
-    lib = cdll.LoadLibrary(lib_path)
-except OSError as e:
-    print(f"Error: Could not load libir_system.so: {e}. Make sure it's compiled and in the project root.")
-    exit(1)
-
-lib.init_inverted_index.argtypes = []
-lib.init_inverted_index.restype = None
-
-lib.build_index_for_document_with_zipf.argtypes = [c_char_p, c_int]
-lib.build_index_for_document_with_zipf.restype = None
-
-lib.build_index_for_document.argtypes = [c_char_p, c_int]
-lib.build_index_for_document.restype = None
-
-lib.cleanup_inverted_index.argtypes = []
-lib.cleanup_inverted_index.restype = None
-
-lib.boolean_search.argtypes = [c_char_p]
-lib.boolean_search.restype = c_void_p
-
-lib.free_doc_list.argtypes = [c_void_p]
-lib.free_doc_list.restype = None
-
-lib.init_hash_table.argtypes = []
-lib.init_hash_table.restype = None
-
-
-class DocListNode(Structure):
-    _fields_ = [("doc_id", c_int),
-                ("next", c_void_p)]
-
-def parse_doc_list(doc_list_ptr):
-    results = []
-    current_node = cast(doc_list_ptr, POINTER(DocListNode))
-    while current_node and current_node.contents.doc_id >= 0:
-        results.append(current_node.contents.doc_id)
-        current_node = cast(current_node.contents.next, POINTER(DocListNode))
-    return results
+data_dir = os.path.join(project_root, "data")
+doc_store_path = os.path.join(data_dir, "doc_store.bin")
+
+os.makedirs(data_dir, exist_ok=True)
+
+sys.path.insert(0, project_root)
+from ir_system import Index
+
+def suggest_query(query):
+    corrected_words = []
+    changed = False
+    for word in query.split():
+        if word == "NOT" or "*" in word or "~" in word:
+            corrected_words.append(word)
+            continue
+        prefix = "-" if len(word) > 1 and word.startswith("-") else ""
+        body = word[len(prefix):]
+        suggestions = search_index.suggest(body, max_suggestions=1)
+        if suggestions and suggestions[0]["distance"] > 0:
+            body = suggestions[0]["surface"]
+            changed = True
+        corrected_words.append(prefix + body)
+    return " ".join(corrected_words) if changed else None
+
+SNIPPET_LENGTH = 240
+MAX_SNIPPETS = 10
+HIGHLIGHT_OPEN = "\x02"
+HIGHLIGHT_CLOSE = "\x03"
+
+def get_snippet_html(query, doc_id):
+    snippet = search_index.snippet(query, doc_id, SNIPPET_LENGTH, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE)
+    if snippet is None:
+        return None
+    html = str(escape(snippet)).replace(HIGHLIGHT_OPEN, "<mark>").replace(HIGHLIGHT_CLOSE, "</mark>")
+    return Markup(html)
 
 MONGO_URI = "mongodb://localhost:27017/"
 DATABASE_NAME = "ir_system"
 COLLECTION_NAME = "documents"
 
 doc_map = {}
+search_index = None
 
 def initialize_search_engine():
+    global search_index
     client = None
     try:
         client = pymongo.MongoClient(MONGO_URI)
         db = client[DATABASE_NAME]
         collection = db[COLLECTION_NAME]
 
-        lib.init_inverted_index()
+        search_index = Index()
         print("C++ Inverted Index Initialized.")
+        search_index.open_doc_store_writer(doc_store_path)
 
         documents_cursor = collection.find({})
         for doc_id, document in enumerate(documents_cursor):
             doc_map[doc_id] = {"title": document.get("title", "N/A"), "url": document.get("url", "N/A")}
             if "content" in document:
-                content_bytes = document["content"].encode('utf-8')
-                lib.build_index_for_document(content_bytes, doc_id)
+                search_index.add_document(doc_id, document["content"])
+
+        search_index.close_doc_store_writer()
+        if not search_index.open_doc_store(doc_store_path):
+            print("Document store is unavailable, results will be shown without snippets.")
+        search_index.build_term_dictionary()
         
         print(f"Index built with {len(doc_map)} documents. Ready for web queries.")
 
@@ -95,29 +97,35 @@ def index():
 def search():
     query = request.args.get('query', '')
     search_results_display = []
+    suggestion = None
 
     if query:
-        query_bytes = query.encode('utf-8')
-        result_list_ptr = lib.boolean_search(query_bytes)
-        
-        if not result_list_ptr:
-            search_results_ids = []
-        else:
-            search_results_ids = parse_doc_list(result_list_ptr)
-            lib.free_doc_list(result_list_ptr)
+        search_results_ids = search_index.search(query)
 
-        for doc_id in search_results_ids:
+        for rank, doc_id in enumerate(search_results_ids):
             doc_info = doc_map.get(doc_id, {"title": "N/A", "url": "N/A"})
             search_results_display.append({
                 "id": doc_id,
                 "title": doc_info["title"],
-                "url": doc_info["url"]
+                "url": doc_info["url"],
+                "snippet": get_snippet_html(query, doc_id) if rank < MAX_SNIPPETS else None
             })
 
-    return render_template('index.html', query=query, results=search_results_display)
+        if not search_results_display:
+            suggestion = suggest_query(query)
+
+    return render_template('index.html', query=query, results=search_results_display, suggestion=suggestion)
+
+@app.route('/suggest')
+def suggest():
+    term = request.args.get('term', '')
+    max_distance = request.args.get('max_distance', 2, type=int)
+    if not term:
+        return jsonify([])
+    return jsonify(search_index.suggest(term, max_distance=max_distance))
 
 if __name__ == '__main__':
     import atexit
-    atexit.register(lambda: (lib.cleanup_inverted_index() and print("C++ Inverted Index memory cleaned up.")) if 'lib' in locals() else None)
+    atexit.register(lambda: (search_index.close(), print("C++ Inverted Index memory cleaned up.")) if search_index else None)
     
     app.run(debug=True, host='0.0.0.0')
@@ -0,0 +1,149 @@
+#include "batch_search.h"
+#include "boolean_index.h"
+#include "posting_list.h"
+#include <atomic>
+#include <string>
+#include <thread>
+#include <vector>
+
+struct ResolvedClause {
+    PostingList* postings;
+    bool owned;
+};
+
+// Maps a clause key to its index in the resolved clauses of a batch, so a
+// clause repeated by many queries is resolved once.
+struct ResolvedClauseNode {
+    std::string key;
+    int resolved_id;
+    ResolvedClauseNode* next;
+};
+
+struct BatchQuery {
+    std::vector<QueryClause> clauses;
+    std::vector<int> resolved_ids;
+};
+
+PostingList* evaluate_batch_query(const BatchQuery& query, const std::vector<ResolvedClause>& resolved) {
+    PostingList* current_results = nullptr;
+    for (size_t i = 0; i < query.clauses.size(); ++i) {
+        current_results = apply_query_clause(current_results, query.clauses[i], resolved[query.resolved_ids[i]].postings);
+        if (posting_list_cardinality(current_results) == 0) {
+            break;
+        }
+    }
+    return current_results;
+}
+
+extern "C" BatchSearchResults* boolean_search_batch(const char** queries, int query_count, int num_threads) {
+    if (query_count < 0) {
+        query_count = 0;
+    }
+
+    // Parse every query and resolve each distinct clause once. Wildcard and
+    // fuzzy expansions (and the lazily built term dictionary) are shared by
+    // all queries of the batch, and the workers below only read the index.
+    std::vector<BatchQuery> batch(query_count);
+    int clause_count = 0;
+    for (int q = 0; q < query_count; ++q) {
+        if (queries[q] != nullptr) {
+            parse_boolean_query(queries[q], batch[q].clauses);
+            clause_count += static_cast<int>(batch[q].clauses.size());
+        }
+    }
+    int bucket_count = clause_count > 0 ? clause_count : 1;
+    ResolvedClauseNode** resolved_table = new ResolvedClauseNode*[bucket_count];
+    for (int i = 0; i < bucket_count; ++i) {
+        resolved_table[i] = nullptr;
+    }
+    std::vector<ResolvedClause> resolved;
+    for (int q = 0; q < query_count; ++q) {
+        for (const QueryClause& clause : batch[q].clauses) {
+            std::string key = query_clause_key(clause);
+            unsigned int bucket = custom_hash_index(key) % bucket_count;
+            ResolvedClauseNode* node = resolved_table[bucket];
+            while (node != nullptr && node->key != key) {
+                node = node->next;
+            }
+            if (node == nullptr) {
+                ResolvedClause entry;
+                entry.postings = resolve_query_clause(clause, entry.owned);
+                node = new ResolvedClauseNode();
+                node->key = key;
+                node->resolved_id = static_cast<int>(resolved.size());
+                node->next = resolved_table[bucket];
+                resolved_table[bucket] = node;
+                resolved.push_back(entry);
+            }
+            batch[q].resolved_ids.push_back(node->resolved_id);
+        }
+    }
+    for (int i = 0; i < bucket_count; ++i) {
+        ResolvedClauseNode* current = resolved_table[i];
+        while (current != nullptr) {
+            ResolvedClauseNode* to_delete = current;
+            current = current->next;
+            delete to_delete;
+        }
+    }
+    delete[] resolved_table;
+
+    if (num_threads <= 0) {
+        num_threads = static_cast<int>(std::thread::hardware_concurrency());
+        if (num_threads <= 0) {
+            num_threads = 1;
+        }
+    }
+    if (num_threads > query_count) {
+        num_threads = query_count > 0 ? query_count : 1;
+    }
+
+    std::vector<PostingList*> query_results(query_count, nullptr);
+    std::atomic<int> next_query(0);
+    auto worker = [&]() {
+        int q;
+        while ((q = next_query.fetch_add(1)) < query_count) {
+            query_results[q] = evaluate_batch_query(batch[q], resolved);
+        }
+    };
+    if (num_threads == 1) {
+        worker();
+    } else {
+        std::vector<std::thread> workers;
+        for (int t = 0; t < num_threads; ++t) {
+            workers.emplace_back(worker);
+        }
+        for (std::thread& thread : workers) {
+            thread.join();
+        }
+    }
+
+    BatchSearchResults* results = new BatchSearchResults;
+    results->query_count = query_count;
+    results->offsets = new long long[query_count + 1];
+    results->offsets[0] = 0;
+    for (int q = 0; q < query_count; ++q) {
+        results->offsets[q + 1] = results->offsets[q] + posting_list_cardinality(query_results[q]);
+    }
+    results->doc_ids = new int[results->offsets[query_count] > 0 ? results->offsets[query_count] : 1];
+    for (int q = 0; q < query_count; ++q) {
+        posting_list_to_array(query_results[q], results->doc_ids + results->offsets[q]);
+        free_posting_list(query_results[q]);
+    }
+
+    for (const ResolvedClause& entry : resolved) {
+        if (entry.owned) {
+            free_posting_list(entry.postings);
+        }
+    }
+    return results;
+}
+
+extern "C" void free_batch_results(BatchSearchResults* results) {
+    if (results == nullptr) {
+        return;
+    }
+    delete[] results->offsets;
+    delete[] results->doc_ids;
+    delete results;
+}
@@ -0,0 +1,16 @@
+#ifndef BATCH_SEARCH_H
+#define BATCH_SEARCH_H
+
+// Results of a batch search: the doc ids of query i are
+// doc_ids[offsets[i]] .. doc_ids[offsets[i + 1] - 1], in ascending order.
+// Offsets are 64-bit: a large batch can hold more than INT_MAX doc ids.
+struct BatchSearchResults {
+    int query_count;
+    long long* offsets;
+    int* doc_ids;
+};
+
+extern "C" BatchSearchResults* boolean_search_batch(const char** queries, int query_count, int num_threads);
+extern "C" void free_batch_results(BatchSearchResults* results);
+
+#endif // BATCH_SEARCH_H
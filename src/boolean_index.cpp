@@ -1,6 +1,8 @@
 #include "boolean_index.h"
 #include "tokenizer.h"
 #include "stemmer.h"
+#include "term_dictionary.h"
+#include "posting_list.h"
 #include <iostream>
 #include <string>
 #include <vector>
@@ -20,26 +22,16 @@ extern "C" void init_inverted_index() {
     for (int i = 0; i < INVERTED_INDEX_HASHTABLE_SIZE; ++i) {
         inverted_index_table[i] = nullptr;
     }
+    invalidate_term_dictionary();
 }
 
-extern "C" void add_to_inverted_index(const std::string& term, int doc_id) {
+IndexEntryNode* get_or_create_index_entry(const std::string& term) {
     unsigned int index = custom_hash_index(term) % INVERTED_INDEX_HASHTABLE_SIZE;
 
     IndexEntryNode* current_entry = inverted_index_table[index];
     while (current_entry != nullptr) {
         if (current_entry->term == term) {
-            DocListNode* current_doc = current_entry->doc_list_head;
-            while (current_doc != nullptr) {
-                if (current_doc->doc_id == doc_id) {
-                    return;
-                }
-                current_doc = current_doc->next;
-            }
-            DocListNode* new_doc_node = new DocListNode();
-            new_doc_node->doc_id = doc_id;
-            new_doc_node->next = current_entry->doc_list_head;
-            current_entry->doc_list_head = new_doc_node;
-            return;
+            return current_entry;
         }
         current_entry = current_entry->next;
     }
@@ -48,29 +40,44 @@ extern "C" void add_to_inverted_index(const std::string& term, int doc_id) {
     new_entry_node->term = term;
     new_entry_node->next = inverted_index_table[index];
     inverted_index_table[index] = new_entry_node;
+    invalidate_term_dictionary();
+
+    new_entry_node->postings = create_posting_list();
+    return new_entry_node;
+}
+
+PostingList* get_or_create_term_postings(const std::string& term) {
+    return get_or_create_index_entry(term)->postings;
+}
+
+void record_surface_form(IndexEntryNode* entry, const std::string& surface) {
+    if (entry->surface.empty() || surface.length() < entry->surface.length()) {
+        entry->surface = surface;
+    }
+}
 
-    DocListNode* new_doc_node = new DocListNode();
-    new_doc_node->doc_id = doc_id;
-    new_doc_node->next = nullptr;
-    new_entry_node->doc_list_head = new_doc_node;
+extern "C" void add_to_inverted_index(const std::string& term, int doc_id) {
+    posting_list_add(get_or_create_term_postings(term), doc_id);
+}
+
+void add_token_to_inverted_index(const std::string& term, const std::string& surface, int doc_id) {
+    IndexEntryNode* entry = get_or_create_index_entry(term);
+    record_surface_form(entry, surface);
+    posting_list_add(entry->postings, doc_id);
 }
 
 extern "C" void cleanup_inverted_index() {
     for (int i = 0; i < INVERTED_INDEX_HASHTABLE_SIZE; ++i) {
         IndexEntryNode* current_entry = inverted_index_table[i];
         while (current_entry != nullptr) {
-            DocListNode* current_doc = current_entry->doc_list_head;
-            while (current_doc != nullptr) {
-                DocListNode* to_delete_doc = current_doc;
-                current_doc = current_doc->next;
-                delete to_delete_doc;
-            }
+            free_posting_list(current_entry->postings);
             IndexEntryNode* to_delete_entry = current_entry;
             current_entry = current_entry->next;
             delete to_delete_entry;
         }
         inverted_index_table[i] = nullptr;
     }
+    cleanup_term_dictionary();
 }
 
 extern "C" void print_inverted_index() {
@@ -79,11 +86,12 @@ extern "C" void print_inverted_index() {
         IndexEntryNode* current_entry = inverted_index_table[i];
         while (current_entry != nullptr) {
             std::cout << "Term: " << current_entry->term << " -> Doc IDs: ";
-            DocListNode* current_doc = current_entry->doc_list_head;
-            while (current_doc != nullptr) {
-                std::cout << current_doc->doc_id << " ";
-                current_doc = current_doc->next;
+            int* doc_ids = new int[posting_list_cardinality(current_entry->postings)];
+            int doc_count = posting_list_to_array(current_entry->postings, doc_ids);
+            for (int j = 0; j < doc_count; ++j) {
+                std::cout << doc_ids[j] << " ";
             }
+            delete[] doc_ids;
             std::cout << "\n";
             current_entry = current_entry->next;
         }
@@ -91,12 +99,12 @@ extern "C" void print_inverted_index() {
     std::cout << "--- End Inverted Index Contents ---\n\n";
 }
 
-extern "C" DocListNode* find_term_in_index(const std::string& term) {
+PostingList* find_term_in_index(const std::string& term) {
     unsigned int index = custom_hash_index(term) % INVERTED_INDEX_HASHTABLE_SIZE;
     IndexEntryNode* current_entry = inverted_index_table[index];
     while (current_entry != nullptr) {
         if (current_entry->term == term) {
-            return current_entry->doc_list_head;
+            return current_entry->postings;
         }
         current_entry = current_entry->next;
     }
@@ -212,18 +220,17 @@ extern "C" DocListNode* difference_doc_lists(DocListNode* list1, DocListNode* li
     return resultHead;
 }
 
-extern "C" DocListNode* boolean_search(const char* query_cstr) {
+void parse_boolean_query(const char* query_cstr, std::vector<QueryClause>& clauses) {
     std::string query_str(query_cstr);
     std::stringstream ss(query_str);
     std::string token_str;
 
-    DocListNode* current_results = nullptr;
-    bool first_term_processed = false;
-
     while (ss >> token_str) {
-        bool is_not = false;
+        QueryClause clause;
+        clause.is_not = false;
+        clause.fuzzy_distance = 0;
         if (token_str == "NOT" || (token_str.length() > 1 && token_str[0] == '-')) {
-            is_not = true;
+            clause.is_not = true;
             if (token_str == "NOT") {
                 if (!(ss >> token_str)) {
                     continue;
@@ -232,36 +239,99 @@ extern "C" DocListNode* boolean_search(const char* query_cstr) {
                 token_str = token_str.substr(1);
             }
         }
-        
-        std::string stemmed_token = stem(token_str);
-        if (stemmed_token.empty()) {
-            continue;
-        }
 
-        DocListNode* docs_for_term = find_term_in_index(stemmed_token);
-        
-        if (!first_term_processed) {
-            if (!is_not) {
-                current_results = copy_doc_list(docs_for_term);
-            } else {
-                current_results = nullptr;
-            }
-            first_term_processed = true;
+        token_str = normalize_term(token_str);
+        if (is_wildcard_term(token_str)) {
+            clause.kind = QUERY_CLAUSE_WILDCARD;
+            clause.term = token_str;
+        } else if (parse_fuzzy_term(token_str, clause.term, clause.fuzzy_distance)) {
+            clause.kind = QUERY_CLAUSE_FUZZY;
         } else {
-            if (!is_not) {
-                DocListNode* intersected_list = intersect_doc_lists(current_results, docs_for_term);
-                free_doc_list(current_results);
-                current_results = intersected_list;
-            } else {
-                DocListNode* diff_list = difference_doc_lists(current_results, docs_for_term);
-                free_doc_list(current_results);
-                current_results = diff_list;
+            clause.kind = QUERY_CLAUSE_TERM;
+            clause.term = stem(token_str);
+            if (clause.term.empty()) {
+                continue;
             }
         }
+        clauses.push_back(clause);
+    }
+}
+
+std::string query_clause_key(const QueryClause& clause) {
+    if (clause.kind == QUERY_CLAUSE_FUZZY) {
+        return "~" + std::to_string(clause.fuzzy_distance) + ":" + clause.term;
+    }
+    if (clause.kind == QUERY_CLAUSE_WILDCARD) {
+        return "*:" + clause.term;
+    }
+    return "=:" + clause.term;
+}
+
+PostingList* resolve_query_clause(const QueryClause& clause, bool& owns_postings) {
+    if (clause.kind == QUERY_CLAUSE_WILDCARD) {
+        owns_postings = true;
+        return expand_wildcard_term(clause.term);
+    }
+    if (clause.kind == QUERY_CLAUSE_FUZZY) {
+        owns_postings = true;
+        return expand_fuzzy_term(clause.term, clause.fuzzy_distance);
+    }
+    owns_postings = false;
+    return find_term_in_index(clause.term);
+}
+
+PostingList* apply_query_clause(PostingList* current_results, const QueryClause& clause, const PostingList* docs_for_term) {
+    if (current_results == nullptr) {
+        if (!clause.is_not) {
+            return copy_posting_list(docs_for_term);
+        }
+        return create_posting_list();
+    }
+    PostingList* combined_list = clause.is_not ? posting_list_andnot(current_results, docs_for_term)
+                                               : posting_list_and(current_results, docs_for_term);
+    free_posting_list(current_results);
+    return combined_list;
+}
+
+PostingList* evaluate_boolean_query(const char* query_cstr) {
+    std::vector<QueryClause> clauses;
+    parse_boolean_query(query_cstr, clauses);
 
-        if (current_results == nullptr) {
+    PostingList* current_results = nullptr;
+    for (const QueryClause& clause : clauses) {
+        bool owns_docs_for_term = false;
+        PostingList* docs_for_term = resolve_query_clause(clause, owns_docs_for_term);
+        current_results = apply_query_clause(current_results, clause, docs_for_term);
+        if (owns_docs_for_term) {
+            free_posting_list(docs_for_term);
+        }
+
+        if (posting_list_cardinality(current_results) == 0) {
             break;
         }
     }
     return current_results;
-}
\ No newline at end of file
+}
+
+extern "C" DocListNode* boolean_search(const char* query_cstr) {
+    PostingList* results = evaluate_boolean_query(query_cstr);
+    DocListNode* doc_list = posting_list_to_doc_list(results);
+    free_posting_list(results);
+    return doc_list;
+}
+
+extern "C" int* boolean_search_array(const char* query_cstr, int* count) {
+    PostingList* results = evaluate_boolean_query(query_cstr);
+    *count = posting_list_cardinality(results);
+    int* doc_ids = nullptr;
+    if (*count > 0) {
+        doc_ids = new int[*count];
+        posting_list_to_array(results, doc_ids);
+    }
+    free_posting_list(results);
+    return doc_ids;
+}
+
+extern "C" void free_doc_ids(int* doc_ids) {
+    delete[] doc_ids;
+}
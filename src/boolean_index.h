@@ -2,18 +2,35 @@
 #define BOOLEAN_INDEX_H
 
 #include <string>
+#include <vector>
 
 struct DocListNode {
     int doc_id;
     DocListNode* next;
 };
 
+struct PostingList;
+
 struct IndexEntryNode {
     std::string term;
-    DocListNode* doc_list_head;
+    // Shortest unstemmed token indexed under term, shown to users in place
+    // of the stem ("philosophy" rather than "philosophi").
+    std::string surface;
+    PostingList* postings;
     IndexEntryNode* next;
 };
 
+const int QUERY_CLAUSE_TERM = 0;
+const int QUERY_CLAUSE_WILDCARD = 1;
+const int QUERY_CLAUSE_FUZZY = 2;
+
+struct QueryClause {
+    std::string term;
+    int kind;
+    int fuzzy_distance;
+    bool is_not;
+};
+
 const int INVERTED_INDEX_HASHTABLE_SIZE = 10000;
 
 extern IndexEntryNode* inverted_index_table[INVERTED_INDEX_HASHTABLE_SIZE];
@@ -23,11 +40,25 @@ extern "C" void add_to_inverted_index(const std::string& term, int doc_id);
 extern "C" void cleanup_inverted_index();
 extern "C" void print_inverted_index();
 extern "C" DocListNode* boolean_search(const char* query_cstr);
+extern "C" int* boolean_search_array(const char* query_cstr, int* count);
+extern "C" void free_doc_ids(int* doc_ids);
 extern "C" void free_doc_list(DocListNode* head);
 extern "C" DocListNode* create_doc_node(int doc_id);
 extern "C" DocListNode* copy_doc_list(DocListNode* head);
 extern "C" DocListNode* intersect_doc_lists(DocListNode* list1, DocListNode* list2);
 extern "C" DocListNode* difference_doc_lists(DocListNode* list1, DocListNode* list2);
 
+unsigned int custom_hash_index(const std::string& s);
+PostingList* find_term_in_index(const std::string& term);
+IndexEntryNode* get_or_create_index_entry(const std::string& term);
+PostingList* get_or_create_term_postings(const std::string& term);
+void record_surface_form(IndexEntryNode* entry, const std::string& surface);
+void add_token_to_inverted_index(const std::string& term, const std::string& surface, int doc_id);
+void parse_boolean_query(const char* query_cstr, std::vector<QueryClause>& clauses);
+std::string query_clause_key(const QueryClause& clause);
+PostingList* resolve_query_clause(const QueryClause& clause, bool& owns_postings);
+PostingList* apply_query_clause(PostingList* current_results, const QueryClause& clause, const PostingList* docs_for_term);
+PostingList* evaluate_boolean_query(const char* query_cstr);
+
 #endif // BOOLEAN_INDEX_H
 
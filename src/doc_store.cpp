@@ -0,0 +1,603 @@
+#include "doc_store.h"
+#include "tokenizer.h"
+#include "stemmer.h"
+#include "term_dictionary.h"
+#include <cerrno>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <iostream>
+#include <string>
+#include <vector>
+#include <fcntl.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+// File layout: "IRDS" magic, version, block size; then one record per
+// document (its LZ-compressed text blocks, the block offset table and the
+// document's term table); then the directory of records; then a footer
+// holding the directory offset, the record count and the magic again.
+const char DOC_STORE_MAGIC[4] = {'I', 'R', 'D', 'S'};
+const int DOC_STORE_VERSION = 1;
+const int DOC_STORE_HEADER_SIZE = 12;
+const int DOC_STORE_DIRECTORY_RECORD_SIZE = 32;
+const int DOC_STORE_FOOTER_SIZE = 16;
+const int LZ_HASH_BITS = 12;
+const int LZ_MIN_MATCH = 4;
+const int LZ_MAX_OFFSET = 65535;
+
+FILE* doc_store_writer = nullptr;
+DocStoreEntry* writer_entries = nullptr;
+int writer_entry_capacity = 0;
+
+// Read with pread only, so concurrent get_snippet calls never share a file
+// position.
+int doc_store_reader = -1;
+DocStoreEntry* reader_entries = nullptr;
+int reader_entry_count = 0;
+
+unsigned int hash_doc_term(const std::string& term) {
+    unsigned int hash = 2166136261u;
+    for (char c : term) {
+        hash ^= static_cast<unsigned char>(c);
+        hash *= 16777619u;
+    }
+    return hash;
+}
+
+int lz_compress_bound(int src_len) {
+    return src_len + src_len / 255 + 16;
+}
+
+unsigned char* lz_write_length(unsigned char* out, int length) {
+    while (length >= 255) {
+        *out++ = 255;
+        length -= 255;
+    }
+    *out++ = static_cast<unsigned char>(length);
+    return out;
+}
+
+// LZ77 with an LZ4-like sequence format: a token byte holding the literal
+// length and the match length (minus LZ_MIN_MATCH) in its two nibbles, with
+// 255-continuation bytes for values >= 15, the literals, and a 2-byte
+// little-endian match offset. The final sequence carries literals only.
+int lz_compress(const unsigned char* src, int src_len, unsigned char* dst) {
+    int table[1 << LZ_HASH_BITS];
+    for (int i = 0; i < (1 << LZ_HASH_BITS); ++i) {
+        table[i] = -1;
+    }
+
+    unsigned char* out = dst;
+    int anchor = 0;
+    int ip = 0;
+    while (ip + LZ_MIN_MATCH <= src_len) {
+        unsigned int sequence;
+        std::memcpy(&sequence, src + ip, 4);
+        unsigned int h = (sequence * 2654435761u) >> (32 - LZ_HASH_BITS);
+        int ref = table[h];
+        table[h] = ip;
+        if (ref < 0 || ip - ref > LZ_MAX_OFFSET || std::memcmp(src + ref, src + ip, LZ_MIN_MATCH) != 0) {
+            ip++;
+            continue;
+        }
+
+        int match_len = LZ_MIN_MATCH;
+        while (ip + match_len < src_len && src[ref + match_len] == src[ip + match_len]) {
+            match_len++;
+        }
+
+        int literal_len = ip - anchor;
+        int match_code = match_len - LZ_MIN_MATCH;
+        unsigned char* token = out++;
+        *token = static_cast<unsigned char>(((literal_len < 15 ? literal_len : 15) << 4) | (match_code < 15 ? match_code : 15));
+        if (literal_len >= 15) {
+            out = lz_write_length(out, literal_len - 15);
+        }
+        std::memcpy(out, src + anchor, literal_len);
+        out += literal_len;
+        int offset = ip - ref;
+        *out++ = static_cast<unsigned char>(offset & 0xFF);
+        *out++ = static_cast<unsigned char>(offset >> 8);
+        if (match_code >= 15) {
+            out = lz_write_length(out, match_code - 15);
+        }
+
+        ip += match_len;
+        anchor = ip;
+    }
+
+    int literal_len = src_len - anchor;
+    *out++ = static_cast<unsigned char>((literal_len < 15 ? literal_len : 15) << 4);
+    if (literal_len >= 15) {
+        out = lz_write_length(out, literal_len - 15);
+    }
+    std::memcpy(out, src + anchor, literal_len);
+    out += literal_len;
+    return static_cast<int>(out - dst);
+}
+
+// Returns the number of bytes written, or -1 if the input is malformed.
+int lz_decompress(const unsigned char* src, int src_len, unsigned char* dst, int dst_len) {
+    const unsigned char* in = src;
+    const unsigned char* in_end = src + src_len;
+    unsigned char* out = dst;
+    unsigned char* out_end = dst + dst_len;
+
+    while (in < in_end) {
+        unsigned char token = *in++;
+        int literal_len = token >> 4;
+        if (literal_len == 15) {
+            unsigned char extra;
+            do {
+                if (in >= in_end) {
+                    return -1;
+                }
+                extra = *in++;
+                literal_len += extra;
+            } while (extra == 255);
+        }
+        if (literal_len > in_end - in || literal_len > out_end - out) {
+            return -1;
+        }
+        std::memcpy(out, in, literal_len);
+        in += literal_len;
+        out += literal_len;
+        if (in == in_end) {
+            break;
+        }
+
+        if (in_end - in < 2) {
+            return -1;
+        }
+        int offset = in[0] | (in[1] << 8);
+        in += 2;
+        int match_len = (token & 0x0F);
+        if (match_len == 15) {
+            unsigned char extra;
+            do {
+                if (in >= in_end) {
+                    return -1;
+                }
+                extra = *in++;
+                match_len += extra;
+            } while (extra == 255);
+        }
+        match_len += LZ_MIN_MATCH;
+        if (offset == 0 || offset > out - dst || match_len > out_end - out) {
+            return -1;
+        }
+        const unsigned char* match = out - offset;
+        for (int i = 0; i < match_len; ++i) {
+            out[i] = match[i];
+        }
+        out += match_len;
+    }
+    return static_cast<int>(out - dst);
+}
+
+int compare_doc_term_offsets(const void* a, const void* b) {
+    const DocTermOffset* offset_a = static_cast<const DocTermOffset*>(a);
+    const DocTermOffset* offset_b = static_cast<const DocTermOffset*>(b);
+    if (offset_a->term_hash != offset_b->term_hash) {
+        return offset_a->term_hash < offset_b->term_hash ? -1 : 1;
+    }
+    if (offset_a->first_offset != offset_b->first_offset) {
+        return offset_a->first_offset < offset_b->first_offset ? -1 : 1;
+    }
+    return 0;
+}
+
+extern "C" int doc_store_open_writer(const char* path) {
+    doc_store_close_writer();
+    doc_store_writer = std::fopen(path, "wb");
+    if (doc_store_writer == nullptr) {
+        std::cerr << "Error: Could not open file " << path << " for writing the document store." << std::endl;
+        return 0;
+    }
+    std::fwrite(DOC_STORE_MAGIC, 1, 4, doc_store_writer);
+    std::fwrite(&DOC_STORE_VERSION, sizeof(int), 1, doc_store_writer);
+    std::fwrite(&DOC_STORE_BLOCK_SIZE, sizeof(int), 1, doc_store_writer);
+    return 1;
+}
+
+bool doc_store_writer_is_open() {
+    return doc_store_writer != nullptr;
+}
+
+void doc_store_add_document(int doc_id, const std::string& text, std::vector<DocTermOffset>& term_offsets) {
+    if (doc_store_writer == nullptr || doc_id < 0 || text.empty()) {
+        return;
+    }
+
+    if (doc_id >= writer_entry_capacity) {
+        int new_capacity = writer_entry_capacity > 0 ? writer_entry_capacity : 64;
+        while (new_capacity <= doc_id) {
+            new_capacity *= 2;
+        }
+        DocStoreEntry* grown = new DocStoreEntry[new_capacity];
+        for (int i = 0; i < new_capacity; ++i) {
+            grown[i] = i < writer_entry_capacity ? writer_entries[i] : DocStoreEntry{false, 0, 0, 0, 0, 0};
+        }
+        delete[] writer_entries;
+        writer_entries = grown;
+        writer_entry_capacity = new_capacity;
+    }
+
+    DocStoreEntry& entry = writer_entries[doc_id];
+    entry.present = true;
+    entry.text_length = static_cast<int>(text.length());
+    entry.block_count = (entry.text_length + DOC_STORE_BLOCK_SIZE - 1) / DOC_STORE_BLOCK_SIZE;
+    entry.blocks_offset = std::ftell(doc_store_writer);
+
+    unsigned int* block_offsets = new unsigned int[entry.block_count + 1];
+    unsigned char* compressed = new unsigned char[lz_compress_bound(DOC_STORE_BLOCK_SIZE)];
+    const unsigned char* raw = reinterpret_cast<const unsigned char*>(text.data());
+    block_offsets[0] = 0;
+    for (int b = 0; b < entry.block_count; ++b) {
+        int raw_len = entry.text_length - b * DOC_STORE_BLOCK_SIZE;
+        if (raw_len > DOC_STORE_BLOCK_SIZE) {
+            raw_len = DOC_STORE_BLOCK_SIZE;
+        }
+        int compressed_len = lz_compress(raw + b * DOC_STORE_BLOCK_SIZE, raw_len, compressed);
+        std::fwrite(compressed, 1, compressed_len, doc_store_writer);
+        block_offsets[b + 1] = block_offsets[b] + compressed_len;
+    }
+    delete[] compressed;
+
+    entry.tables_offset = std::ftell(doc_store_writer);
+    std::fwrite(block_offsets, sizeof(unsigned int), entry.block_count + 1, doc_store_writer);
+    delete[] block_offsets;
+
+    entry.term_count = 0;
+    if (term_offsets.empty()) {
+        return;
+    }
+    std::qsort(term_offsets.data(), term_offsets.size(), sizeof(DocTermOffset), compare_doc_term_offsets);
+    int unique_count = 0;
+    for (size_t i = 0; i < term_offsets.size(); ++i) {
+        if (unique_count == 0 || term_offsets[unique_count - 1].term_hash != term_offsets[i].term_hash) {
+            term_offsets[unique_count++] = term_offsets[i];
+        }
+    }
+    std::fwrite(term_offsets.data(), sizeof(DocTermOffset), unique_count, doc_store_writer);
+    entry.term_count = unique_count;
+}
+
+extern "C" void doc_store_close_writer() {
+    if (doc_store_writer == nullptr) {
+        return;
+    }
+
+    long long directory_offset = std::ftell(doc_store_writer);
+    int directory_count = 0;
+    for (int doc_id = 0; doc_id < writer_entry_capacity; ++doc_id) {
+        DocStoreEntry& entry = writer_entries[doc_id];
+        if (!entry.present) {
+            continue;
+        }
+        std::fwrite(&doc_id, sizeof(int), 1, doc_store_writer);
+        std::fwrite(&entry.text_length, sizeof(int), 1, doc_store_writer);
+        std::fwrite(&entry.block_count, sizeof(int), 1, doc_store_writer);
+        std::fwrite(&entry.term_count, sizeof(int), 1, doc_store_writer);
+        std::fwrite(&entry.blocks_offset, sizeof(long long), 1, doc_store_writer);
+        std::fwrite(&entry.tables_offset, sizeof(long long), 1, doc_store_writer);
+        directory_count++;
+    }
+    std::fwrite(&directory_offset, sizeof(long long), 1, doc_store_writer);
+    std::fwrite(&directory_count, sizeof(int), 1, doc_store_writer);
+    std::fwrite(DOC_STORE_MAGIC, 1, 4, doc_store_writer);
+    std::fclose(doc_store_writer);
+    doc_store_writer = nullptr;
+
+    delete[] writer_entries;
+    writer_entries = nullptr;
+    writer_entry_capacity = 0;
+}
+
+extern "C" void doc_store_close() {
+    if (doc_store_reader >= 0) {
+        close(doc_store_reader);
+        doc_store_reader = -1;
+    }
+    delete[] reader_entries;
+    reader_entries = nullptr;
+    reader_entry_count = 0;
+}
+
+bool read_doc_store_bytes(long long offset, void* buffer, size_t length) {
+    char* out = static_cast<char*>(buffer);
+    while (length > 0) {
+        ssize_t read_count = pread(doc_store_reader, out, length, offset);
+        if (read_count < 0 && errno == EINTR) {
+            continue;
+        }
+        if (read_count <= 0) {
+            return false;
+        }
+        out += read_count;
+        offset += read_count;
+        length -= read_count;
+    }
+    return true;
+}
+
+// A directory record must describe a document whose blocks, block offset
+// table and term table all lie between the header and the directory.
+bool is_valid_doc_store_entry(int doc_id, const DocStoreEntry& entry, long long directory_offset) {
+    return doc_id >= 0 && entry.text_length >= 0 && entry.term_count >= 0
+        && entry.block_count == (entry.text_length + DOC_STORE_BLOCK_SIZE - 1) / DOC_STORE_BLOCK_SIZE
+        && entry.blocks_offset >= DOC_STORE_HEADER_SIZE && entry.blocks_offset <= entry.tables_offset
+        && entry.tables_offset + static_cast<long long>(sizeof(unsigned int)) * (entry.block_count + 1)
+            + static_cast<long long>(sizeof(DocTermOffset)) * entry.term_count <= directory_offset;
+}
+
+extern "C" int doc_store_open(const char* path) {
+    doc_store_close();
+    doc_store_reader = open(path, O_RDONLY);
+    struct stat file_info;
+    if (doc_store_reader < 0 || fstat(doc_store_reader, &file_info) != 0) {
+        std::cerr << "Error: Could not open document store " << path << "." << std::endl;
+        doc_store_close();
+        return 0;
+    }
+    long long reader_file_size = file_info.st_size;
+
+    char header[DOC_STORE_HEADER_SIZE];
+    char footer[DOC_STORE_FOOTER_SIZE];
+    int version = 0;
+    int block_size = 0;
+    long long directory_offset = 0;
+    int directory_count = 0;
+    bool valid = reader_file_size >= DOC_STORE_HEADER_SIZE + DOC_STORE_FOOTER_SIZE
+        && read_doc_store_bytes(0, header, DOC_STORE_HEADER_SIZE)
+        && read_doc_store_bytes(reader_file_size - DOC_STORE_FOOTER_SIZE, footer, DOC_STORE_FOOTER_SIZE);
+    if (valid) {
+        std::memcpy(&version, header + 4, sizeof(int));
+        std::memcpy(&block_size, header + 8, sizeof(int));
+        std::memcpy(&directory_offset, footer, sizeof(long long));
+        std::memcpy(&directory_count, footer + 8, sizeof(int));
+        valid = std::memcmp(header, DOC_STORE_MAGIC, 4) == 0 && version == DOC_STORE_VERSION
+            && block_size == DOC_STORE_BLOCK_SIZE && std::memcmp(footer + 12, DOC_STORE_MAGIC, 4) == 0
+            && directory_count >= 0 && directory_offset >= DOC_STORE_HEADER_SIZE
+            && directory_offset + static_cast<long long>(DOC_STORE_DIRECTORY_RECORD_SIZE) * directory_count
+                == reader_file_size - DOC_STORE_FOOTER_SIZE;
+    }
+    if (!valid) {
+        std::cerr << "Error: " << path << " is not a valid document store." << std::endl;
+        doc_store_close();
+        return 0;
+    }
+
+    char* directory = new char[directory_count > 0 ? static_cast<long long>(DOC_STORE_DIRECTORY_RECORD_SIZE) * directory_count : 1];
+    DocStoreEntry* entries = new DocStoreEntry[directory_count > 0 ? directory_count : 1];
+    int* doc_ids = new int[directory_count > 0 ? directory_count : 1];
+    int max_doc_id = -1;
+    valid = read_doc_store_bytes(directory_offset, directory, static_cast<size_t>(DOC_STORE_DIRECTORY_RECORD_SIZE) * directory_count);
+    for (int i = 0; i < directory_count && valid; ++i) {
+        const char* record = directory + static_cast<long long>(DOC_STORE_DIRECTORY_RECORD_SIZE) * i;
+        DocStoreEntry& entry = entries[i];
+        entry.present = true;
+        std::memcpy(&doc_ids[i], record, sizeof(int));
+        std::memcpy(&entry.text_length, record + 4, sizeof(int));
+        std::memcpy(&entry.block_count, record + 8, sizeof(int));
+        std::memcpy(&entry.term_count, record + 12, sizeof(int));
+        std::memcpy(&entry.blocks_offset, record + 16, sizeof(long long));
+        std::memcpy(&entry.tables_offset, record + 24, sizeof(long long));
+        valid = is_valid_doc_store_entry(doc_ids[i], entry, directory_offset);
+        if (valid && doc_ids[i] > max_doc_id) {
+            max_doc_id = doc_ids[i];
+        }
+    }
+    if (valid) {
+        reader_entry_count = max_doc_id + 1;
+        reader_entries = new DocStoreEntry[reader_entry_count > 0 ? reader_entry_count : 1];
+        for (int doc_id = 0; doc_id < reader_entry_count; ++doc_id) {
+            reader_entries[doc_id] = DocStoreEntry{false, 0, 0, 0, 0, 0};
+        }
+        for (int i = 0; i < directory_count; ++i) {
+            reader_entries[doc_ids[i]] = entries[i];
+        }
+    }
+    delete[] directory;
+    delete[] entries;
+    delete[] doc_ids;
+    if (!valid) {
+        std::cerr << "Error: " << path << " has a truncated or corrupt directory." << std::endl;
+        doc_store_close();
+        return 0;
+    }
+    return 1;
+}
+
+// Finds where the document first mentions any of the query stems by looking
+// them up in the document's term table. Returns -1 if none of them occurs.
+long long find_snippet_anchor(const DocStoreEntry& entry, const std::vector<std::string>& stems) {
+    if (entry.term_count == 0 || stems.empty()) {
+        return -1;
+    }
+    DocTermOffset* term_table = new DocTermOffset[entry.term_count];
+    long long term_table_offset = entry.tables_offset + static_cast<long long>(sizeof(unsigned int)) * (entry.block_count + 1);
+    bool loaded = read_doc_store_bytes(term_table_offset, term_table, sizeof(DocTermOffset) * entry.term_count);
+
+    long long anchor = -1;
+    for (size_t i = 0; loaded && i < stems.size(); ++i) {
+        unsigned int hash = hash_doc_term(stems[i]);
+        int low = 0;
+        int high = entry.term_count;
+        while (low < high) {
+            int mid = low + (high - low) / 2;
+            if (term_table[mid].term_hash < hash) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+        if (low < entry.term_count && term_table[low].term_hash == hash) {
+            if (anchor < 0 || term_table[low].first_offset < anchor) {
+                anchor = term_table[low].first_offset;
+            }
+        }
+    }
+    delete[] term_table;
+    return anchor;
+}
+
+// Decompresses only the blocks covering [start, end) and returns that text.
+bool read_document_range(const DocStoreEntry& entry, int start, int end, std::string& text) {
+    int first_block = start / DOC_STORE_BLOCK_SIZE;
+    int last_block = (end - 1) / DOC_STORE_BLOCK_SIZE;
+    int table_len = last_block - first_block + 2;
+    unsigned int* block_offsets = new unsigned int[table_len];
+    bool loaded = read_doc_store_bytes(entry.tables_offset + static_cast<long long>(sizeof(unsigned int)) * first_block,
+                                       block_offsets, sizeof(unsigned int) * table_len);
+
+    // The offsets come from disk: they must not decrease and must keep the
+    // blocks inside the document's record before the compressed length is
+    // trusted.
+    for (int i = 1; loaded && i < table_len; ++i) {
+        loaded = block_offsets[i] >= block_offsets[i - 1];
+    }
+    if (loaded && entry.blocks_offset + block_offsets[table_len - 1] > entry.tables_offset) {
+        loaded = false;
+    }
+    unsigned char* compressed = nullptr;
+    if (loaded) {
+        unsigned int compressed_len = block_offsets[table_len - 1] - block_offsets[0];
+        compressed = new unsigned char[compressed_len > 0 ? compressed_len : 1];
+        loaded = read_doc_store_bytes(entry.blocks_offset + block_offsets[0], compressed, compressed_len);
+    } else {
+        std::cerr << "Error: The document store has a corrupt block offset table." << std::endl;
+    }
+
+    int raw_start = first_block * DOC_STORE_BLOCK_SIZE;
+    int raw_end = (last_block + 1) * DOC_STORE_BLOCK_SIZE;
+    if (raw_end > entry.text_length) {
+        raw_end = entry.text_length;
+    }
+    unsigned char* raw = new unsigned char[raw_end - raw_start];
+    for (int b = first_block; loaded && b <= last_block; ++b) {
+        int raw_len = entry.text_length - b * DOC_STORE_BLOCK_SIZE;
+        if (raw_len > DOC_STORE_BLOCK_SIZE) {
+            raw_len = DOC_STORE_BLOCK_SIZE;
+        }
+        const unsigned char* block = compressed + (block_offsets[b - first_block] - block_offsets[0]);
+        int block_len = block_offsets[b - first_block + 1] - block_offsets[b - first_block];
+        loaded = lz_decompress(block, block_len, raw + (b - first_block) * DOC_STORE_BLOCK_SIZE, raw_len) == raw_len;
+    }
+    if (loaded) {
+        text.assign(reinterpret_cast<char*>(raw) + (start - raw_start), end - start);
+    }
+
+    delete[] raw;
+    delete[] compressed;
+    delete[] block_offsets;
+    return loaded;
+}
+
+bool is_snippet_space(char c) {
+    return c == ' ' || c == '\n' || c == '\r' || c == '\t';
+}
+
+extern "C" char* get_snippet(const char* query_cstr, int doc_id, int max_length, const char* open_tag, const char* close_tag) {
+    if (doc_store_reader < 0 || doc_id < 0 || doc_id >= reader_entry_count || !reader_entries[doc_id].present) {
+        return nullptr;
+    }
+    const DocStoreEntry& entry = reader_entries[doc_id];
+    if (max_length <= 0) {
+        max_length = DEFAULT_SNIPPET_LENGTH;
+    }
+
+    // Wildcard and fuzzy clauses contribute the dictionary terms they expand
+    // to, so the snippet shows the words that actually matched.
+    std::vector<std::string> stems;
+    std::vector<IndexEntryNode*> expansions;
+    std::vector<QueryClause> clauses;
+    parse_boolean_query(query_cstr, clauses);
+    for (const QueryClause& clause : clauses) {
+        if (clause.is_not) {
+            continue;
+        }
+        if (clause.kind == QUERY_CLAUSE_WILDCARD) {
+            collect_wildcard_terms(clause.term, expansions);
+        } else if (clause.kind == QUERY_CLAUSE_FUZZY) {
+            collect_fuzzy_terms(clause.term, clause.fuzzy_distance, expansions);
+        } else {
+            stems.push_back(clause.term);
+            continue;
+        }
+        for (IndexEntryNode* expansion : expansions) {
+            stems.push_back(expansion->term);
+        }
+    }
+
+    long long anchor = find_snippet_anchor(entry, stems);
+    int start = anchor > max_length / 4 ? static_cast<int>(anchor) - max_length / 4 : 0;
+    int end = start + max_length < entry.text_length ? start + max_length : entry.text_length;
+    if (end - start < max_length) {
+        start = end > max_length ? end - max_length : 0;
+    }
+    std::string window;
+    if (end <= start || !read_document_range(entry, start, end, window)) {
+        return nullptr;
+    }
+
+    size_t window_begin = 0;
+    size_t window_end = window.length();
+    if (start > 0) {
+        size_t space = window.find_first_of(" \n\r\t");
+        if (space != std::string::npos && space < window.length() / 2) {
+            window_begin = space + 1;
+        }
+    }
+    if (end < entry.text_length) {
+        size_t space = window.find_last_of(" \n\r\t");
+        if (space != std::string::npos && space > window.length() / 2) {
+            window_end = space;
+        }
+    }
+    while (window_begin < window_end && (static_cast<unsigned char>(window[window_begin]) & 0xC0) == 0x80) {
+        window_begin++;
+    }
+    while (window_end > window_begin && window_end < window.length() && (static_cast<unsigned char>(window[window_end]) & 0xC0) == 0x80) {
+        window_end--;
+    }
+    window = window.substr(window_begin, window_end - window_begin);
+
+    std::string snippet = start + window_begin > 0 ? "..." : "";
+    size_t copied = 0;
+    std::vector<TokenSpan> tokens = tokenize_with_offsets(window);
+    for (size_t i = 0; i <= tokens.size(); ++i) {
+        size_t gap_end = i < tokens.size() ? tokens[i].start : window.length();
+        for (size_t j = copied; j < gap_end; ++j) {
+            if (!is_snippet_space(window[j])) {
+                snippet += window[j];
+            } else if (!snippet.empty() && snippet[snippet.length() - 1] != ' ') {
+                snippet += ' ';
+            }
+        }
+        if (i == tokens.size()) {
+            break;
+        }
+
+        std::string token_stem = stem(tokens[i].text);
+        bool highlighted = false;
+        for (size_t k = 0; k < stems.size() && !highlighted; ++k) {
+            highlighted = !token_stem.empty() && token_stem == stems[k];
+        }
+        std::string original = window.substr(tokens[i].start, tokens[i].end - tokens[i].start);
+        snippet += highlighted ? std::string(open_tag) + original + close_tag : original;
+        copied = tokens[i].end;
+    }
+    if (start + window_end < static_cast<size_t>(entry.text_length)) {
+        snippet += "...";
+    }
+
+    char* result = new char[snippet.length() + 1];
+    std::memcpy(result, snippet.c_str(), snippet.length() + 1);
+    return result;
+}
+
+extern "C" void free_snippet(char* snippet) {
+    delete[] snippet;
+}
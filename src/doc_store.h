@@ -0,0 +1,37 @@
+#ifndef DOC_STORE_H
+#define DOC_STORE_H
+
+#include <string>
+#include <vector>
+
+const int DOC_STORE_BLOCK_SIZE = 16384;
+const int DEFAULT_SNIPPET_LENGTH = 240;
+
+struct DocTermOffset {
+    unsigned int term_hash;
+    unsigned int first_offset;
+};
+
+struct DocStoreEntry {
+    bool present;
+    int text_length;
+    int block_count;
+    int term_count;
+    long long blocks_offset;
+    long long tables_offset;
+};
+
+extern "C" int doc_store_open_writer(const char* path);
+extern "C" void doc_store_close_writer();
+extern "C" int doc_store_open(const char* path);
+extern "C" void doc_store_close();
+extern "C" char* get_snippet(const char* query, int doc_id, int max_length, const char* open_tag, const char* close_tag);
+extern "C" void free_snippet(char* snippet);
+
+bool doc_store_writer_is_open();
+void doc_store_add_document(int doc_id, const std::string& text, std::vector<DocTermOffset>& term_offsets);
+unsigned int hash_doc_term(const std::string& term);
+int lz_compress(const unsigned char* src, int src_len, unsigned char* dst);
+int lz_decompress(const unsigned char* src, int src_len, unsigned char* dst, int dst_len);
+
+#endif // DOC_STORE_H
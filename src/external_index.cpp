@@ -0,0 +1,603 @@
+#include "external_index.h"
+#include "boolean_index.h"
+#include "posting_list.h"
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <iostream>
+#include <string>
+#include <vector>
+
+// File layout shared by the sorted runs and the final index: "IRIX" magic and
+// version; then one record per term in byte order of the terms (term length,
+// term, surface form length, surface form, doc count, last doc id, postings
+// length, varint doc id gaps); then a
+// zero term length, the term count and the magic again. Runs are written and
+// merged strictly front to back, so the build only does sequential I/O.
+const char EXTERNAL_INDEX_MAGIC[4] = {'I', 'R', 'I', 'X'};
+const int EXTERNAL_INDEX_VERSION = 2;
+const int RUN_WRITE_BUFFER_SIZE = 1024 * 1024;
+const long long MIN_MERGE_BUFFER_SIZE = 64 * 1024;
+const long long MAX_MERGE_BUFFER_SIZE = 8 * 1024 * 1024;
+const int MERGE_COPY_BUFFER_SIZE = 64 * 1024;
+
+ExternalTermNode** external_term_table = nullptr;
+int external_term_count = 0;
+long long external_memory_used = 0;
+long long external_memory_budget = 0;
+int external_current_doc_id = -1;
+int external_last_doc_id = -1;
+std::string external_index_path;
+std::vector<std::string> external_run_paths;
+int external_runs_written = 0;
+int external_last_run_term_count = 0;
+// Set once a run could not be written. Its postings are lost, so the build
+// stops accepting documents and closing it fails instead of writing a
+// partial index over the target.
+bool external_build_failed = false;
+
+struct IndexFileCursor {
+    FILE* file;
+    char* buffer;
+    std::string term;
+    std::string surface;
+    unsigned int doc_count;
+    unsigned int last_doc_id;
+    unsigned int postings_length;
+    unsigned int terms_read;
+    bool exhausted;
+};
+
+int write_varint(unsigned char* out, unsigned int value) {
+    int length = 0;
+    while (value >= 0x80) {
+        out[length++] = static_cast<unsigned char>(value | 0x80);
+        value >>= 7;
+    }
+    out[length++] = static_cast<unsigned char>(value);
+    return length;
+}
+
+bool decode_varint(const unsigned char* data, unsigned int length, unsigned int& position, unsigned int& value) {
+    value = 0;
+    for (int shift = 0; shift < 35 && position < length; shift += 7) {
+        unsigned char byte = data[position++];
+        value |= static_cast<unsigned int>(byte & 0x7F) << shift;
+        if ((byte & 0x80) == 0) {
+            return true;
+        }
+    }
+    return false;
+}
+
+bool read_varint(FILE* file, unsigned int& value, int& length) {
+    value = 0;
+    length = 0;
+    for (int shift = 0; shift < 35; shift += 7) {
+        int byte = std::getc(file);
+        if (byte == EOF) {
+            return false;
+        }
+        length++;
+        value |= static_cast<unsigned int>(byte & 0x7F) << shift;
+        if ((byte & 0x80) == 0) {
+            return true;
+        }
+    }
+    return false;
+}
+
+FILE* open_index_file_writer(const std::string& path, char*& buffer, long long buffer_size) {
+    FILE* file = std::fopen(path.c_str(), "wb");
+    if (file == nullptr) {
+        std::cerr << "Error: Could not open file " << path << " for writing the index." << std::endl;
+        return nullptr;
+    }
+    buffer = new char[buffer_size];
+    std::setvbuf(file, buffer, _IOFBF, buffer_size);
+    std::fwrite(EXTERNAL_INDEX_MAGIC, 1, 4, file);
+    std::fwrite(&EXTERNAL_INDEX_VERSION, sizeof(int), 1, file);
+    return file;
+}
+
+void write_term_record_header(FILE* file, const std::string& term, const std::string& surface, unsigned int doc_count, unsigned int last_doc_id, unsigned int postings_length) {
+    unsigned int term_length = static_cast<unsigned int>(term.length());
+    std::fwrite(&term_length, sizeof(unsigned int), 1, file);
+    std::fwrite(term.data(), 1, term_length, file);
+    unsigned int surface_length = static_cast<unsigned int>(surface.length());
+    std::fwrite(&surface_length, sizeof(unsigned int), 1, file);
+    std::fwrite(surface.data(), 1, surface_length, file);
+    std::fwrite(&doc_count, sizeof(unsigned int), 1, file);
+    std::fwrite(&last_doc_id, sizeof(unsigned int), 1, file);
+    std::fwrite(&postings_length, sizeof(unsigned int), 1, file);
+}
+
+bool close_index_file_writer(FILE* file, char* buffer, unsigned int term_count) {
+    unsigned int end_marker = 0;
+    std::fwrite(&end_marker, sizeof(unsigned int), 1, file);
+    std::fwrite(&term_count, sizeof(unsigned int), 1, file);
+    std::fwrite(EXTERNAL_INDEX_MAGIC, 1, 4, file);
+    bool written = std::ferror(file) == 0;
+    written = std::fclose(file) == 0 && written;
+    delete[] buffer;
+    return written;
+}
+
+bool advance_cursor(IndexFileCursor& cursor) {
+    unsigned int term_length = 0;
+    if (std::fread(&term_length, sizeof(unsigned int), 1, cursor.file) != 1) {
+        return false;
+    }
+    if (term_length == 0) {
+        unsigned int term_count = 0;
+        char magic[4];
+        cursor.exhausted = true;
+        return std::fread(&term_count, sizeof(unsigned int), 1, cursor.file) == 1 && term_count == cursor.terms_read
+            && std::fread(magic, 1, 4, cursor.file) == 4 && std::memcmp(magic, EXTERNAL_INDEX_MAGIC, 4) == 0;
+    }
+    cursor.term.resize(term_length);
+    cursor.terms_read++;
+    unsigned int surface_length = 0;
+    if (std::fread(&cursor.term[0], 1, term_length, cursor.file) != term_length
+        || std::fread(&surface_length, sizeof(unsigned int), 1, cursor.file) != 1) {
+        return false;
+    }
+    cursor.surface.resize(surface_length);
+    return std::fread(&cursor.surface[0], 1, surface_length, cursor.file) == surface_length
+        && std::fread(&cursor.doc_count, sizeof(unsigned int), 1, cursor.file) == 1
+        && std::fread(&cursor.last_doc_id, sizeof(unsigned int), 1, cursor.file) == 1
+        && std::fread(&cursor.postings_length, sizeof(unsigned int), 1, cursor.file) == 1
+        && cursor.doc_count > 0 && cursor.postings_length > 0;
+}
+
+bool open_cursor(IndexFileCursor& cursor, const std::string& path, long long buffer_size) {
+    cursor.buffer = nullptr;
+    cursor.terms_read = 0;
+    cursor.exhausted = false;
+    cursor.file = std::fopen(path.c_str(), "rb");
+    if (cursor.file == nullptr) {
+        std::cerr << "Error: Could not open index file " << path << "." << std::endl;
+        return false;
+    }
+    cursor.buffer = new char[buffer_size];
+    std::setvbuf(cursor.file, cursor.buffer, _IOFBF, buffer_size);
+
+    char magic[4];
+    int version = 0;
+    bool valid = std::fread(magic, 1, 4, cursor.file) == 4 && std::memcmp(magic, EXTERNAL_INDEX_MAGIC, 4) == 0
+        && std::fread(&version, sizeof(int), 1, cursor.file) == 1 && version == EXTERNAL_INDEX_VERSION
+        && advance_cursor(cursor);
+    if (!valid) {
+        std::cerr << "Error: " << path << " is not a valid index file." << std::endl;
+    }
+    return valid;
+}
+
+void close_cursor(IndexFileCursor& cursor) {
+    if (cursor.file != nullptr) {
+        std::fclose(cursor.file);
+        cursor.file = nullptr;
+    }
+    delete[] cursor.buffer;
+    cursor.buffer = nullptr;
+}
+
+bool cursor_before(const IndexFileCursor* cursors, int a, int b) {
+    int order = cursors[a].term.compare(cursors[b].term);
+    return order < 0 || (order == 0 && a < b);
+}
+
+void sift_down(int* heap, int heap_size, int position, const IndexFileCursor* cursors) {
+    while (true) {
+        int smallest = position;
+        int left = 2 * position + 1;
+        int right = left + 1;
+        if (left < heap_size && cursor_before(cursors, heap[left], heap[smallest])) {
+            smallest = left;
+        }
+        if (right < heap_size && cursor_before(cursors, heap[right], heap[smallest])) {
+            smallest = right;
+        }
+        if (smallest == position) {
+            return;
+        }
+        int swap = heap[position];
+        heap[position] = heap[smallest];
+        heap[smallest] = swap;
+        position = smallest;
+    }
+}
+
+void sift_up(int* heap, int position, const IndexFileCursor* cursors) {
+    while (position > 0) {
+        int parent = (position - 1) / 2;
+        if (!cursor_before(cursors, heap[position], heap[parent])) {
+            return;
+        }
+        int swap = heap[position];
+        heap[position] = heap[parent];
+        heap[parent] = swap;
+        position = parent;
+    }
+}
+
+int pop_heap(int* heap, int& heap_size, const IndexFileCursor* cursors) {
+    int top = heap[0];
+    heap[0] = heap[--heap_size];
+    sift_down(heap, heap_size, 0, cursors);
+    return top;
+}
+
+bool copy_file_bytes(FILE* from, FILE* to, unsigned int length, char* copy_buffer) {
+    while (length > 0) {
+        size_t chunk = length < static_cast<unsigned int>(MERGE_COPY_BUFFER_SIZE) ? length : MERGE_COPY_BUFFER_SIZE;
+        if (std::fread(copy_buffer, 1, chunk, from) != chunk || std::fwrite(copy_buffer, 1, chunk, to) != chunk) {
+            return false;
+        }
+        length -= static_cast<unsigned int>(chunk);
+    }
+    return true;
+}
+
+// K-way merge of index files whose doc id ranges follow each other in input
+// order. Postings of a term are concatenated without being decoded: only the
+// first gap of each input is rewritten relative to the previous input's last
+// doc id, the rest of the bytes are copied as they are.
+bool merge_index_files(const std::vector<std::string>& input_paths, const std::string& output_path, long long memory_budget, int& term_count) {
+    int input_count = static_cast<int>(input_paths.size());
+    long long buffer_size = memory_budget / (input_count + 1);
+    if (buffer_size < MIN_MERGE_BUFFER_SIZE) {
+        buffer_size = MIN_MERGE_BUFFER_SIZE;
+    }
+    if (buffer_size > MAX_MERGE_BUFFER_SIZE) {
+        buffer_size = MAX_MERGE_BUFFER_SIZE;
+    }
+
+    IndexFileCursor* cursors = new IndexFileCursor[input_count > 0 ? input_count : 1];
+    int* heap = new int[input_count > 0 ? input_count : 1];
+    int* group = new int[input_count > 0 ? input_count : 1];
+    unsigned int* first_doc_ids = new unsigned int[input_count > 0 ? input_count : 1];
+    int* first_gap_lengths = new int[input_count > 0 ? input_count : 1];
+    char* copy_buffer = new char[MERGE_COPY_BUFFER_SIZE];
+    int heap_size = 0;
+    bool valid = true;
+    for (int i = 0; i < input_count; ++i) {
+        cursors[i].file = nullptr;
+        cursors[i].buffer = nullptr;
+    }
+    for (int i = 0; i < input_count && valid; ++i) {
+        valid = open_cursor(cursors[i], input_paths[i], buffer_size);
+        if (valid && !cursors[i].exhausted) {
+            heap[heap_size] = i;
+            sift_up(heap, heap_size++, cursors);
+        }
+    }
+
+    char* output_buffer = nullptr;
+    FILE* output = valid ? open_index_file_writer(output_path, output_buffer, buffer_size) : nullptr;
+    valid = valid && output != nullptr;
+    term_count = 0;
+    while (valid && heap_size > 0) {
+        int group_size = 0;
+        group[group_size++] = pop_heap(heap, heap_size, cursors);
+        const std::string& term = cursors[group[0]].term;
+        while (heap_size > 0 && cursors[heap[0]].term == term) {
+            group[group_size++] = pop_heap(heap, heap_size, cursors);
+        }
+
+        unsigned int doc_count = 0;
+        unsigned int postings_length = 0;
+        unsigned char gap_bytes[5];
+        const std::string* surface = &cursors[group[0]].surface;
+        for (int g = 0; g < group_size && valid; ++g) {
+            IndexFileCursor& cursor = cursors[group[g]];
+            if (cursor.surface.length() < surface->length()) {
+                surface = &cursor.surface;
+            }
+            valid = read_varint(cursor.file, first_doc_ids[g], first_gap_lengths[g]);
+            unsigned int first_gap = first_doc_ids[g];
+            if (g > 0) {
+                unsigned int previous_last = cursors[group[g - 1]].last_doc_id;
+                valid = valid && first_doc_ids[g] > previous_last;
+                first_gap = first_doc_ids[g] - previous_last;
+            }
+            doc_count += cursor.doc_count;
+            postings_length += cursor.postings_length - first_gap_lengths[g] + write_varint(gap_bytes, first_gap);
+        }
+        if (!valid) {
+            std::cerr << "Error: Index runs for term " << term << " are corrupt or overlap." << std::endl;
+            break;
+        }
+
+        write_term_record_header(output, term, *surface, doc_count, cursors[group[group_size - 1]].last_doc_id, postings_length);
+        for (int g = 0; g < group_size && valid; ++g) {
+            IndexFileCursor& cursor = cursors[group[g]];
+            unsigned int first_gap = g > 0 ? first_doc_ids[g] - cursors[group[g - 1]].last_doc_id : first_doc_ids[g];
+            int gap_length = write_varint(gap_bytes, first_gap);
+            valid = std::fwrite(gap_bytes, 1, gap_length, output) == static_cast<size_t>(gap_length)
+                && copy_file_bytes(cursor.file, output, cursor.postings_length - first_gap_lengths[g], copy_buffer);
+        }
+        term_count++;
+
+        for (int g = 0; g < group_size && valid; ++g) {
+            IndexFileCursor& cursor = cursors[group[g]];
+            valid = advance_cursor(cursor);
+            if (valid && !cursor.exhausted) {
+                heap[heap_size] = group[g];
+                sift_up(heap, heap_size++, cursors);
+            }
+        }
+        if (!valid) {
+            std::cerr << "Error: Could not merge index runs into " << output_path << "." << std::endl;
+        }
+    }
+
+    if (output != nullptr) {
+        valid = close_index_file_writer(output, output_buffer, static_cast<unsigned int>(term_count)) && valid;
+    }
+    for (int i = 0; i < input_count; ++i) {
+        close_cursor(cursors[i]);
+    }
+    delete[] cursors;
+    delete[] heap;
+    delete[] group;
+    delete[] first_doc_ids;
+    delete[] first_gap_lengths;
+    delete[] copy_buffer;
+    return valid;
+}
+
+int compare_external_terms(const void* a, const void* b) {
+    const ExternalTermNode* term_a = *static_cast<ExternalTermNode* const*>(a);
+    const ExternalTermNode* term_b = *static_cast<ExternalTermNode* const*>(b);
+    return term_a->term.compare(term_b->term);
+}
+
+void clear_external_term_table() {
+    for (int i = 0; i < EXTERNAL_INDEX_HASHTABLE_SIZE; ++i) {
+        ExternalTermNode* current = external_term_table[i];
+        while (current != nullptr) {
+            ExternalTermNode* to_delete = current;
+            current = current->next;
+            delete[] to_delete->postings;
+            delete to_delete;
+        }
+        external_term_table[i] = nullptr;
+    }
+    external_term_count = 0;
+    external_memory_used = 0;
+}
+
+bool flush_external_run() {
+    if (external_term_count == 0) {
+        return true;
+    }
+    ExternalTermNode** sorted_terms = new ExternalTermNode*[external_term_count];
+    int position = 0;
+    for (int i = 0; i < EXTERNAL_INDEX_HASHTABLE_SIZE; ++i) {
+        for (ExternalTermNode* current = external_term_table[i]; current != nullptr; current = current->next) {
+            sorted_terms[position++] = current;
+        }
+    }
+    std::qsort(sorted_terms, external_term_count, sizeof(ExternalTermNode*), compare_external_terms);
+
+    std::string run_path = external_index_path + ".run" + std::to_string(external_runs_written);
+    char* buffer = nullptr;
+    FILE* run = open_index_file_writer(run_path, buffer, RUN_WRITE_BUFFER_SIZE);
+    bool written = run != nullptr;
+    if (written) {
+        for (int i = 0; i < external_term_count; ++i) {
+            ExternalTermNode* node = sorted_terms[i];
+            write_term_record_header(run, node->term, node->surface, node->doc_count, node->last_doc_id, node->postings_length);
+            std::fwrite(node->postings, 1, node->postings_length, run);
+        }
+        written = close_index_file_writer(run, buffer, external_term_count);
+        if (!written) {
+            std::cerr << "Error: Could not write index run " << run_path << "." << std::endl;
+        }
+        external_run_paths.push_back(run_path);
+        external_runs_written++;
+        external_last_run_term_count = external_term_count;
+    } else {
+        std::cerr << "Error: Could not create index run " << run_path << "." << std::endl;
+    }
+    if (!written) {
+        external_build_failed = true;
+    }
+    delete[] sorted_terms;
+    clear_external_term_table();
+    return written;
+}
+
+void remove_index_files(const std::vector<std::string>& paths) {
+    for (const std::string& path : paths) {
+        std::remove(path.c_str());
+    }
+}
+
+extern "C" int external_index_open_writer(const char* path, long long memory_budget) {
+    if (external_term_table != nullptr) {
+        std::cerr << "Error: An external index build is already in progress." << std::endl;
+        return 0;
+    }
+    external_term_table = new ExternalTermNode*[EXTERNAL_INDEX_HASHTABLE_SIZE];
+    for (int i = 0; i < EXTERNAL_INDEX_HASHTABLE_SIZE; ++i) {
+        external_term_table[i] = nullptr;
+    }
+    external_term_count = 0;
+    external_memory_used = 0;
+    external_memory_budget = memory_budget > 0 ? memory_budget : DEFAULT_INDEX_MEMORY_BUDGET;
+    external_current_doc_id = -1;
+    external_last_doc_id = -1;
+    external_index_path = path;
+    external_run_paths.clear();
+    external_runs_written = 0;
+    external_build_failed = false;
+    return 1;
+}
+
+bool external_index_writer_is_open() {
+    return external_term_table != nullptr;
+}
+
+bool external_index_begin_document(int doc_id) {
+    if (external_build_failed) {
+        return false;
+    }
+    if (doc_id < 0 || doc_id <= external_last_doc_id) {
+        std::cerr << "Error: Document " << doc_id << " skipped, doc ids must increase during an external index build." << std::endl;
+        return false;
+    }
+    external_current_doc_id = doc_id;
+    return true;
+}
+
+void external_index_add_term(const std::string& term, const std::string& surface, int doc_id) {
+    unsigned int index = custom_hash_index(term) % EXTERNAL_INDEX_HASHTABLE_SIZE;
+    ExternalTermNode* node = external_term_table[index];
+    while (node != nullptr && node->term != term) {
+        node = node->next;
+    }
+    if (node == nullptr) {
+        node = new ExternalTermNode();
+        node->term = term;
+        node->surface = surface;
+        node->postings_capacity = 8;
+        node->postings = new unsigned char[node->postings_capacity];
+        node->postings_length = 0;
+        node->doc_count = 0;
+        node->last_doc_id = -1;
+        node->next = external_term_table[index];
+        external_term_table[index] = node;
+        external_term_count++;
+        external_memory_used += sizeof(ExternalTermNode) + node->term.capacity() + node->surface.capacity() + node->postings_capacity;
+    } else {
+        if (surface.length() < node->surface.length()) {
+            node->surface = surface;
+        }
+        if (node->last_doc_id == doc_id) {
+            return;
+        }
+    }
+
+    if (node->postings_length + 5 > node->postings_capacity) {
+        int new_capacity = node->postings_capacity * 2;
+        unsigned char* new_postings = new unsigned char[new_capacity];
+        std::memcpy(new_postings, node->postings, node->postings_length);
+        delete[] node->postings;
+        node->postings = new_postings;
+        external_memory_used += new_capacity - node->postings_capacity;
+        node->postings_capacity = new_capacity;
+    }
+    unsigned int gap = node->last_doc_id < 0 ? doc_id : doc_id - node->last_doc_id;
+    node->postings_length += write_varint(node->postings + node->postings_length, gap);
+    node->doc_count++;
+    node->last_doc_id = doc_id;
+}
+
+void external_index_end_document() {
+    external_last_doc_id = external_current_doc_id;
+    if (external_memory_used >= external_memory_budget) {
+        flush_external_run();
+    }
+}
+
+extern "C" int external_index_close_writer() {
+    if (external_term_table == nullptr) {
+        return -1;
+    }
+    bool valid = !external_build_failed && flush_external_run();
+    clear_external_term_table();
+    delete[] external_term_table;
+    external_term_table = nullptr;
+
+    // Runs beyond the merge fan-in are merged level by level into
+    // intermediate runs, so the number of open files stays bounded.
+    std::vector<std::string> level_paths = external_run_paths;
+    std::vector<std::string> temporary_paths = external_run_paths;
+    int term_count = 0;
+    int merge_level = 0;
+    while (valid && static_cast<int>(level_paths.size()) > MAX_MERGE_FAN_IN) {
+        std::vector<std::string> merged_paths;
+        for (size_t start = 0; start < level_paths.size() && valid; start += MAX_MERGE_FAN_IN) {
+            size_t end = start + MAX_MERGE_FAN_IN < level_paths.size() ? start + MAX_MERGE_FAN_IN : level_paths.size();
+            std::vector<std::string> group(level_paths.begin() + start, level_paths.begin() + end);
+            std::string merged_path = external_index_path + ".merge" + std::to_string(merge_level) + "_" + std::to_string(merged_paths.size());
+            valid = merge_index_files(group, merged_path, external_memory_budget, term_count);
+            merged_paths.push_back(merged_path);
+            temporary_paths.push_back(merged_path);
+            remove_index_files(group);
+        }
+        level_paths = merged_paths;
+        merge_level++;
+    }
+
+    // The index at the output path is only replaced by a rename once the new
+    // one is complete, so a failed build leaves the previous index in place.
+    std::string output_path = external_index_path + ".tmp";
+    if (valid && level_paths.size() == 1 && merge_level == 0) {
+        // A single run already is a complete index.
+        output_path = level_paths[0];
+        term_count = external_last_run_term_count;
+    } else if (valid) {
+        temporary_paths.push_back(output_path);
+        valid = merge_index_files(level_paths, output_path, external_memory_budget, term_count);
+    }
+    if (valid && std::rename(output_path.c_str(), external_index_path.c_str()) != 0) {
+        std::cerr << "Error: Could not move the merged index to " << external_index_path << "." << std::endl;
+        valid = false;
+    }
+    remove_index_files(temporary_paths);
+    external_run_paths.clear();
+    return valid ? term_count : -1;
+}
+
+extern "C" void external_index_abort_writer() {
+    if (external_term_table == nullptr) {
+        return;
+    }
+    clear_external_term_table();
+    delete[] external_term_table;
+    external_term_table = nullptr;
+    remove_index_files(external_run_paths);
+    external_run_paths.clear();
+}
+
+extern "C" int external_index_run_count() {
+    return external_runs_written;
+}
+
+extern "C" int load_external_index(const char* path) {
+    IndexFileCursor cursor;
+    bool opened = open_cursor(cursor, path, MAX_MERGE_BUFFER_SIZE);
+    bool valid = opened;
+    unsigned char* postings = nullptr;
+    unsigned int postings_capacity = 0;
+    while (valid && !cursor.exhausted) {
+        if (cursor.postings_length > postings_capacity) {
+            delete[] postings;
+            postings_capacity = cursor.postings_length;
+            postings = new unsigned char[postings_capacity];
+        }
+        valid = std::fread(postings, 1, cursor.postings_length, cursor.file) == cursor.postings_length;
+        IndexEntryNode* entry = get_or_create_index_entry(cursor.term);
+        record_surface_form(entry, cursor.surface);
+        PostingList* term_postings = entry->postings;
+        unsigned int doc_id = 0;
+        unsigned int position = 0;
+        for (unsigned int i = 0; i < cursor.doc_count && valid; ++i) {
+            unsigned int gap = 0;
+            valid = decode_varint(postings, cursor.postings_length, position, gap);
+            doc_id = i == 0 ? gap : doc_id + gap;
+            posting_list_add(term_postings, static_cast<int>(doc_id));
+        }
+        valid = valid && position == cursor.postings_length && advance_cursor(cursor);
+    }
+    if (opened && !valid) {
+        std::cerr << "Error: Index file " << path << " is truncated or corrupt." << std::endl;
+    }
+    int term_count = static_cast<int>(cursor.terms_read);
+    close_cursor(cursor);
+    delete[] postings;
+    return valid ? term_count : -1;
+}
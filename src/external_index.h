@@ -0,0 +1,34 @@
+#ifndef EXTERNAL_INDEX_H
+#define EXTERNAL_INDEX_H
+
+#include <string>
+
+const int EXTERNAL_INDEX_HASHTABLE_SIZE = 65536;
+const long long DEFAULT_INDEX_MEMORY_BUDGET = 256LL * 1024 * 1024;
+const int MAX_MERGE_FAN_IN = 128;
+
+// Postings of one term collected between two run flushes, kept as
+// varint-encoded doc id gaps in increasing doc id order.
+struct ExternalTermNode {
+    std::string term;
+    std::string surface;
+    unsigned char* postings;
+    int postings_length;
+    int postings_capacity;
+    int doc_count;
+    int last_doc_id;
+    ExternalTermNode* next;
+};
+
+extern "C" int external_index_open_writer(const char* path, long long memory_budget);
+extern "C" int external_index_close_writer();
+extern "C" void external_index_abort_writer();
+extern "C" int external_index_run_count();
+extern "C" int load_external_index(const char* path);
+
+bool external_index_writer_is_open();
+bool external_index_begin_document(int doc_id);
+void external_index_add_term(const std::string& term, const std::string& surface, int doc_id);
+void external_index_end_document();
+
+#endif // EXTERNAL_INDEX_H
@@ -3,28 +3,48 @@
 #include "stemmer.h"
 #include "boolean_index.h"
 #include "zipf_analyzer.h"
+#include "doc_store.h"
+#include "external_index.h"
 #include <iostream>
 #include <vector>
 
-extern "C" void build_index_for_document(const char* text_cstr, int doc_id) {
+void index_document(const char* text_cstr, int doc_id, bool with_zipf) {
+    bool external_build = external_index_writer_is_open();
+    if (external_build && !external_index_begin_document(doc_id)) {
+        return;
+    }
     std::string text(text_cstr);
-    std::vector<std::string> tokens = tokenize(text);
-    for (const std::string& token : tokens) {
-        std::string stemmed_token = stem(token);
+    std::vector<TokenSpan> tokens = tokenize_with_offsets(text);
+    bool store_document = doc_store_writer_is_open();
+    std::vector<DocTermOffset> term_offsets;
+    for (const TokenSpan& token : tokens) {
+        std::string stemmed_token = stem(token.text);
         if (!stemmed_token.empty()) {
-            add_to_inverted_index(stemmed_token, doc_id);
+            if (external_build) {
+                external_index_add_term(stemmed_token, token.text, doc_id);
+            } else {
+                add_token_to_inverted_index(stemmed_token, token.text, doc_id);
+            }
+            if (with_zipf) {
+                add_word_frequency(stemmed_token);
+            }
+            if (store_document) {
+                term_offsets.push_back({hash_doc_term(stemmed_token), static_cast<unsigned int>(token.start)});
+            }
         }
     }
+    if (store_document) {
+        doc_store_add_document(doc_id, text, term_offsets);
+    }
+    if (external_build) {
+        external_index_end_document();
+    }
+}
+
+extern "C" void build_index_for_document(const char* text_cstr, int doc_id) {
+    index_document(text_cstr, doc_id, false);
 }
 
 extern "C" void build_index_for_document_with_zipf(const char* text_cstr, int doc_id) {
-    std::string text(text_cstr);
-    std::vector<std::string> tokens = tokenize(text);
-    for (const std::string& token : tokens) {
-        std::string stemmed_token = stem(token);
-        if (!stemmed_token.empty()) {
-            add_to_inverted_index(stemmed_token, doc_id);
-            add_word_frequency(stemmed_token);
-        }
-    }
+    index_document(text_cstr, doc_id, true);
 }
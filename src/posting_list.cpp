@@ -0,0 +1,508 @@
+#include "posting_list.h"
+#include "boolean_index.h"
+
+void init_array_container(PostingContainer& container, unsigned short key, int capacity) {
+    container.key = key;
+    container.cardinality = 0;
+    container.capacity = capacity > 0 ? capacity : 1;
+    container.values = new unsigned short[container.capacity];
+    container.bitmap = nullptr;
+}
+
+void init_bitmap_container(PostingContainer& container, unsigned short key) {
+    container.key = key;
+    container.cardinality = 0;
+    container.capacity = 0;
+    container.values = nullptr;
+    container.bitmap = new unsigned long long[BITMAP_CONTAINER_WORDS]();
+}
+
+void free_container(PostingContainer& container) {
+    delete[] container.values;
+    delete[] container.bitmap;
+    container.values = nullptr;
+    container.bitmap = nullptr;
+}
+
+void copy_container(const PostingContainer& source, PostingContainer& target) {
+    if (source.bitmap != nullptr) {
+        init_bitmap_container(target, source.key);
+        for (int i = 0; i < BITMAP_CONTAINER_WORDS; ++i) {
+            target.bitmap[i] = source.bitmap[i];
+        }
+    } else {
+        init_array_container(target, source.key, source.cardinality);
+        for (int i = 0; i < source.cardinality; ++i) {
+            target.values[i] = source.values[i];
+        }
+    }
+    target.cardinality = source.cardinality;
+}
+
+bool container_contains(const PostingContainer& container, unsigned short value) {
+    if (container.bitmap != nullptr) {
+        return (container.bitmap[value >> 6] >> (value & 63)) & 1ULL;
+    }
+    int low = 0;
+    int high = container.cardinality;
+    while (low < high) {
+        int mid = low + (high - low) / 2;
+        if (container.values[mid] < value) {
+            low = mid + 1;
+        } else {
+            high = mid;
+        }
+    }
+    return low < container.cardinality && container.values[low] == value;
+}
+
+void convert_to_bitmap(PostingContainer& container) {
+    unsigned long long* bitmap = new unsigned long long[BITMAP_CONTAINER_WORDS]();
+    for (int i = 0; i < container.cardinality; ++i) {
+        unsigned short value = container.values[i];
+        bitmap[value >> 6] |= 1ULL << (value & 63);
+    }
+    delete[] container.values;
+    container.values = nullptr;
+    container.capacity = 0;
+    container.bitmap = bitmap;
+}
+
+void convert_to_array(PostingContainer& container) {
+    unsigned short* values = new unsigned short[container.cardinality > 0 ? container.cardinality : 1];
+    int position = 0;
+    for (int i = 0; i < BITMAP_CONTAINER_WORDS; ++i) {
+        unsigned long long word = container.bitmap[i];
+        while (word != 0) {
+            values[position++] = static_cast<unsigned short>((i << 6) + __builtin_ctzll(word));
+            word &= word - 1;
+        }
+    }
+    delete[] container.bitmap;
+    container.bitmap = nullptr;
+    container.values = values;
+    container.capacity = container.cardinality > 0 ? container.cardinality : 1;
+}
+
+// Bitmaps that shrank to array size are converted back so that every
+// container always uses the smaller of the two representations.
+void normalize_container(PostingContainer& container) {
+    if (container.bitmap != nullptr && container.cardinality <= ARRAY_CONTAINER_MAX_SIZE) {
+        convert_to_array(container);
+    } else if (container.bitmap == nullptr && container.cardinality > ARRAY_CONTAINER_MAX_SIZE) {
+        convert_to_bitmap(container);
+    }
+}
+
+int count_bitmap(const unsigned long long* bitmap) {
+    int count = 0;
+    for (int i = 0; i < BITMAP_CONTAINER_WORDS; ++i) {
+        count += __builtin_popcountll(bitmap[i]);
+    }
+    return count;
+}
+
+bool container_add(PostingContainer& container, unsigned short value) {
+    if (container.bitmap != nullptr) {
+        unsigned long long mask = 1ULL << (value & 63);
+        if (container.bitmap[value >> 6] & mask) {
+            return false;
+        }
+        container.bitmap[value >> 6] |= mask;
+        container.cardinality++;
+        return true;
+    }
+
+    int position = container.cardinality;
+    if (position > 0 && container.values[position - 1] >= value) {
+        int low = 0;
+        int high = container.cardinality;
+        while (low < high) {
+            int mid = low + (high - low) / 2;
+            if (container.values[mid] < value) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+        if (container.values[low] == value) {
+            return false;
+        }
+        position = low;
+    }
+
+    if (container.cardinality == ARRAY_CONTAINER_MAX_SIZE) {
+        convert_to_bitmap(container);
+        return container_add(container, value);
+    }
+    if (container.cardinality == container.capacity) {
+        int new_capacity = container.capacity * 2 < ARRAY_CONTAINER_MAX_SIZE ? container.capacity * 2 : ARRAY_CONTAINER_MAX_SIZE;
+        unsigned short* grown = new unsigned short[new_capacity];
+        for (int i = 0; i < container.cardinality; ++i) {
+            grown[i] = container.values[i];
+        }
+        delete[] container.values;
+        container.values = grown;
+        container.capacity = new_capacity;
+    }
+    for (int i = container.cardinality; i > position; --i) {
+        container.values[i] = container.values[i - 1];
+    }
+    container.values[position] = value;
+    container.cardinality++;
+    return true;
+}
+
+PostingContainer* append_container_slot(PostingList* list) {
+    if (list->container_count == list->container_capacity) {
+        int new_capacity = list->container_capacity > 0 ? list->container_capacity * 2 : 4;
+        PostingContainer* grown = new PostingContainer[new_capacity];
+        for (int i = 0; i < list->container_count; ++i) {
+            grown[i] = list->containers[i];
+        }
+        delete[] list->containers;
+        list->containers = grown;
+        list->container_capacity = new_capacity;
+    }
+    return &list->containers[list->container_count++];
+}
+
+// Returns the index of the container with the given key, or -(position + 1)
+// where position is the index at which it would have to be inserted.
+int find_container(const PostingList* list, unsigned short key) {
+    if (list->container_count > 0 && list->containers[list->container_count - 1].key == key) {
+        return list->container_count - 1;
+    }
+    int low = 0;
+    int high = list->container_count;
+    while (low < high) {
+        int mid = low + (high - low) / 2;
+        if (list->containers[mid].key < key) {
+            low = mid + 1;
+        } else {
+            high = mid;
+        }
+    }
+    if (low < list->container_count && list->containers[low].key == key) {
+        return low;
+    }
+    return -(low + 1);
+}
+
+PostingList* create_posting_list() {
+    PostingList* list = new PostingList();
+    list->containers = nullptr;
+    list->container_count = 0;
+    list->container_capacity = 0;
+    list->cardinality = 0;
+    return list;
+}
+
+void free_posting_list(PostingList* list) {
+    if (list == nullptr) {
+        return;
+    }
+    for (int i = 0; i < list->container_count; ++i) {
+        free_container(list->containers[i]);
+    }
+    delete[] list->containers;
+    delete list;
+}
+
+PostingList* copy_posting_list(const PostingList* list) {
+    PostingList* copy = create_posting_list();
+    if (list == nullptr) {
+        return copy;
+    }
+    for (int i = 0; i < list->container_count; ++i) {
+        copy_container(list->containers[i], *append_container_slot(copy));
+    }
+    copy->cardinality = list->cardinality;
+    return copy;
+}
+
+bool posting_list_add(PostingList* list, int doc_id) {
+    if (doc_id < 0) {
+        return false;
+    }
+    unsigned short key = static_cast<unsigned short>(static_cast<unsigned int>(doc_id) >> 16);
+    unsigned short value = static_cast<unsigned short>(doc_id & 0xFFFF);
+    int index = find_container(list, key);
+    if (index < 0) {
+        int position = -index - 1;
+        append_container_slot(list);
+        for (int i = list->container_count - 1; i > position; --i) {
+            list->containers[i] = list->containers[i - 1];
+        }
+        init_array_container(list->containers[position], key, 4);
+        index = position;
+    }
+    if (!container_add(list->containers[index], value)) {
+        return false;
+    }
+    list->cardinality++;
+    return true;
+}
+
+bool posting_list_contains(const PostingList* list, int doc_id) {
+    if (list == nullptr || doc_id < 0) {
+        return false;
+    }
+    int index = find_container(list, static_cast<unsigned short>(static_cast<unsigned int>(doc_id) >> 16));
+    return index >= 0 && container_contains(list->containers[index], static_cast<unsigned short>(doc_id & 0xFFFF));
+}
+
+int posting_list_cardinality(const PostingList* list) {
+    return list != nullptr ? list->cardinality : 0;
+}
+
+void and_containers(const PostingContainer& a, const PostingContainer& b, PostingContainer& out) {
+    if (a.bitmap != nullptr && b.bitmap != nullptr) {
+        init_bitmap_container(out, a.key);
+        for (int i = 0; i < BITMAP_CONTAINER_WORDS; ++i) {
+            out.bitmap[i] = a.bitmap[i] & b.bitmap[i];
+        }
+        out.cardinality = count_bitmap(out.bitmap);
+        normalize_container(out);
+        return;
+    }
+    if (a.bitmap != nullptr || b.bitmap != nullptr) {
+        const PostingContainer& array = a.bitmap != nullptr ? b : a;
+        const PostingContainer& bitmap = a.bitmap != nullptr ? a : b;
+        init_array_container(out, a.key, array.cardinality);
+        for (int i = 0; i < array.cardinality; ++i) {
+            unsigned short value = array.values[i];
+            if ((bitmap.bitmap[value >> 6] >> (value & 63)) & 1ULL) {
+                out.values[out.cardinality++] = value;
+            }
+        }
+        return;
+    }
+    init_array_container(out, a.key, a.cardinality < b.cardinality ? a.cardinality : b.cardinality);
+    int i = 0;
+    int j = 0;
+    while (i < a.cardinality && j < b.cardinality) {
+        if (a.values[i] < b.values[j]) {
+            i++;
+        } else if (a.values[i] > b.values[j]) {
+            j++;
+        } else {
+            out.values[out.cardinality++] = a.values[i];
+            i++;
+            j++;
+        }
+    }
+}
+
+void andnot_containers(const PostingContainer& a, const PostingContainer& b, PostingContainer& out) {
+    if (a.bitmap != nullptr) {
+        init_bitmap_container(out, a.key);
+        if (b.bitmap != nullptr) {
+            for (int i = 0; i < BITMAP_CONTAINER_WORDS; ++i) {
+                out.bitmap[i] = a.bitmap[i] & ~b.bitmap[i];
+            }
+        } else {
+            for (int i = 0; i < BITMAP_CONTAINER_WORDS; ++i) {
+                out.bitmap[i] = a.bitmap[i];
+            }
+            for (int i = 0; i < b.cardinality; ++i) {
+                unsigned short value = b.values[i];
+                out.bitmap[value >> 6] &= ~(1ULL << (value & 63));
+            }
+        }
+        out.cardinality = count_bitmap(out.bitmap);
+        normalize_container(out);
+        return;
+    }
+    init_array_container(out, a.key, a.cardinality);
+    if (b.bitmap != nullptr) {
+        for (int i = 0; i < a.cardinality; ++i) {
+            unsigned short value = a.values[i];
+            if (!((b.bitmap[value >> 6] >> (value & 63)) & 1ULL)) {
+                out.values[out.cardinality++] = value;
+            }
+        }
+        return;
+    }
+    int j = 0;
+    for (int i = 0; i < a.cardinality; ++i) {
+        while (j < b.cardinality && b.values[j] < a.values[i]) {
+            j++;
+        }
+        if (j >= b.cardinality || b.values[j] != a.values[i]) {
+            out.values[out.cardinality++] = a.values[i];
+        }
+    }
+}
+
+void or_container_inplace(PostingContainer& target, const PostingContainer& source) {
+    if (target.bitmap == nullptr && (source.bitmap != nullptr || target.cardinality + source.cardinality > ARRAY_CONTAINER_MAX_SIZE)) {
+        convert_to_bitmap(target);
+    }
+    if (target.bitmap != nullptr) {
+        if (source.bitmap != nullptr) {
+            for (int i = 0; i < BITMAP_CONTAINER_WORDS; ++i) {
+                target.bitmap[i] |= source.bitmap[i];
+            }
+        } else {
+            for (int i = 0; i < source.cardinality; ++i) {
+                unsigned short value = source.values[i];
+                target.bitmap[value >> 6] |= 1ULL << (value & 63);
+            }
+        }
+        target.cardinality = count_bitmap(target.bitmap);
+        normalize_container(target);
+        return;
+    }
+
+    unsigned short* merged = new unsigned short[target.cardinality + source.cardinality];
+    int count = 0;
+    int i = 0;
+    int j = 0;
+    while (i < target.cardinality || j < source.cardinality) {
+        if (j >= source.cardinality || (i < target.cardinality && target.values[i] < source.values[j])) {
+            merged[count++] = target.values[i++];
+        } else if (i >= target.cardinality || source.values[j] < target.values[i]) {
+            merged[count++] = source.values[j++];
+        } else {
+            merged[count++] = target.values[i];
+            i++;
+            j++;
+        }
+    }
+    delete[] target.values;
+    target.values = merged;
+    target.capacity = target.cardinality + source.cardinality;
+    target.cardinality = count;
+}
+
+PostingList* posting_list_and(const PostingList* list1, const PostingList* list2) {
+    PostingList* result = create_posting_list();
+    if (list1 == nullptr || list2 == nullptr) {
+        return result;
+    }
+    int i = 0;
+    int j = 0;
+    while (i < list1->container_count && j < list2->container_count) {
+        unsigned short key1 = list1->containers[i].key;
+        unsigned short key2 = list2->containers[j].key;
+        if (key1 < key2) {
+            i++;
+        } else if (key1 > key2) {
+            j++;
+        } else {
+            PostingContainer container;
+            and_containers(list1->containers[i], list2->containers[j], container);
+            if (container.cardinality > 0) {
+                *append_container_slot(result) = container;
+                result->cardinality += container.cardinality;
+            } else {
+                free_container(container);
+            }
+            i++;
+            j++;
+        }
+    }
+    return result;
+}
+
+PostingList* posting_list_andnot(const PostingList* list1, const PostingList* list2) {
+    PostingList* result = create_posting_list();
+    if (list1 == nullptr) {
+        return result;
+    }
+    int j = 0;
+    for (int i = 0; i < list1->container_count; ++i) {
+        const PostingContainer& a = list1->containers[i];
+        while (list2 != nullptr && j < list2->container_count && list2->containers[j].key < a.key) {
+            j++;
+        }
+        PostingContainer container;
+        if (list2 != nullptr && j < list2->container_count && list2->containers[j].key == a.key) {
+            andnot_containers(a, list2->containers[j], container);
+        } else {
+            copy_container(a, container);
+        }
+        if (container.cardinality > 0) {
+            *append_container_slot(result) = container;
+            result->cardinality += container.cardinality;
+        } else {
+            free_container(container);
+        }
+    }
+    return result;
+}
+
+void posting_list_or_inplace(PostingList* target, const PostingList* source) {
+    if (source == nullptr || source->container_count == 0) {
+        return;
+    }
+    int merged_capacity = target->container_count + source->container_count;
+    PostingContainer* merged = new PostingContainer[merged_capacity];
+    int count = 0;
+    int i = 0;
+    int j = 0;
+    target->cardinality = 0;
+    while (i < target->container_count || j < source->container_count) {
+        if (j >= source->container_count || (i < target->container_count && target->containers[i].key < source->containers[j].key)) {
+            merged[count] = target->containers[i++];
+        } else if (i >= target->container_count || source->containers[j].key < target->containers[i].key) {
+            copy_container(source->containers[j++], merged[count]);
+        } else {
+            merged[count] = target->containers[i++];
+            or_container_inplace(merged[count], source->containers[j++]);
+        }
+        target->cardinality += merged[count].cardinality;
+        count++;
+    }
+    delete[] target->containers;
+    target->containers = merged;
+    target->container_count = count;
+    target->container_capacity = merged_capacity;
+}
+
+int posting_list_to_array(const PostingList* list, int* doc_ids) {
+    if (list == nullptr) {
+        return 0;
+    }
+    int position = 0;
+    for (int c = 0; c < list->container_count; ++c) {
+        const PostingContainer& container = list->containers[c];
+        int high = static_cast<int>(container.key) << 16;
+        if (container.bitmap != nullptr) {
+            for (int i = 0; i < BITMAP_CONTAINER_WORDS; ++i) {
+                unsigned long long word = container.bitmap[i];
+                while (word != 0) {
+                    doc_ids[position++] = high | ((i << 6) + __builtin_ctzll(word));
+                    word &= word - 1;
+                }
+            }
+        } else {
+            for (int i = 0; i < container.cardinality; ++i) {
+                doc_ids[position++] = high | container.values[i];
+            }
+        }
+    }
+    return position;
+}
+
+DocListNode* posting_list_to_doc_list(const PostingList* list) {
+    if (list == nullptr || list->cardinality == 0) {
+        return nullptr;
+    }
+    int* doc_ids = new int[list->cardinality];
+    int count = posting_list_to_array(list, doc_ids);
+    DocListNode* head = nullptr;
+    DocListNode* tail = nullptr;
+    for (int i = 0; i < count; ++i) {
+        DocListNode* node = create_doc_node(doc_ids[i]);
+        if (head == nullptr) {
+            head = node;
+        } else {
+            tail->next = node;
+        }
+        tail = node;
+    }
+    delete[] doc_ids;
+    return head;
+}
@@ -0,0 +1,39 @@
+#ifndef POSTING_LIST_H
+#define POSTING_LIST_H
+
+#include "boolean_index.h"
+
+// Roaring-style posting list: doc ids are split by their high 16 bits into
+// containers. A container holds its low 16 bits either as a sorted array
+// (up to ARRAY_CONTAINER_MAX_SIZE values) or as a 65536-bit bitmap.
+const int ARRAY_CONTAINER_MAX_SIZE = 4096;
+const int BITMAP_CONTAINER_WORDS = 1024;
+
+struct PostingContainer {
+    unsigned short key;
+    int cardinality;
+    unsigned short* values;
+    int capacity;
+    unsigned long long* bitmap;
+};
+
+struct PostingList {
+    PostingContainer* containers;
+    int container_count;
+    int container_capacity;
+    int cardinality;
+};
+
+PostingList* create_posting_list();
+void free_posting_list(PostingList* list);
+PostingList* copy_posting_list(const PostingList* list);
+bool posting_list_add(PostingList* list, int doc_id);
+bool posting_list_contains(const PostingList* list, int doc_id);
+int posting_list_cardinality(const PostingList* list);
+PostingList* posting_list_and(const PostingList* list1, const PostingList* list2);
+PostingList* posting_list_andnot(const PostingList* list1, const PostingList* list2);
+void posting_list_or_inplace(PostingList* target, const PostingList* source);
+int posting_list_to_array(const PostingList* list, int* doc_ids);
+DocListNode* posting_list_to_doc_list(const PostingList* list);
+
+#endif // POSTING_LIST_H
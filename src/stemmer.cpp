@@ -1,4 +1,5 @@
 #include "stemmer.h"
+#include "tokenizer.h"
 #include <string>
 #include <vector>
 #include <cctype>
@@ -33,7 +34,7 @@ std::string replace_suffix(const std::string& word, const std::string& old_suffi
     return word.substr(0, word.length() - old_suffix.length()) + new_suffix;
 }
 
-std::string stem(const std::string& word) {
+std::string stem_english(const std::string& word) {
     if (word.length() <= 2) {
         return word;
     }
@@ -68,3 +69,143 @@ std::string stem(const std::string& word) {
 
     return s;
 }
+
+// Russian Snowball stemmer. Cyrillic letters are two bytes in UTF-8, so
+// endings are matched as byte suffixes and regions are byte offsets.
+const char* const RUSSIAN_VOWELS[] = {"а", "е", "и", "о", "у", "ы", "э", "ю", "я"};
+const char* const PERFECTIVE_GERUND_1[] = {"в", "вши", "вшись"};
+const char* const PERFECTIVE_GERUND_2[] = {"ив", "ивши", "ившись", "ыв", "ывши", "ывшись"};
+const char* const ADJECTIVE_ENDINGS[] = {"ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем", "им", "ым", "ом",
+                                         "его", "ого", "ему", "ому", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею"};
+const char* const PARTICIPLE_1[] = {"ем", "нн", "вш", "ющ", "щ"};
+const char* const PARTICIPLE_2[] = {"ивш", "ывш", "ующ"};
+const char* const REFLEXIVE_ENDINGS[] = {"ся", "сь"};
+const char* const VERB_1[] = {"ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет", "ют", "ны", "ть", "ешь", "нно"};
+const char* const VERB_2[] = {"ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей", "уй", "ил", "ыл", "им", "ым", "ен",
+                              "ило", "ыло", "ено", "ят", "ует", "уют", "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю"};
+const char* const NOUN_ENDINGS[] = {"а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии", "и", "ией", "ей", "ой", "ий",
+                                    "й", "иям", "ям", "ием", "ем", "ам", "ом", "о", "у", "ах", "иях", "ях", "ы", "ь", "ию", "ью",
+                                    "ю", "ия", "ья", "я"};
+const char* const SUPERLATIVE_ENDINGS[] = {"ейш", "ейше"};
+const char* const DERIVATIONAL_ENDINGS[] = {"ост", "ость"};
+
+template <size_t N>
+size_t longest_ending(const std::string& word, size_t region_start, const char* const (&endings)[N]) {
+    size_t longest = 0;
+    for (const char* ending : endings) {
+        size_t length = std::char_traits<char>::length(ending);
+        if (length > longest && word.length() >= region_start + length && word.compare(word.length() - length, length, ending) == 0) {
+            longest = length;
+        }
+    }
+    return longest;
+}
+
+bool is_russian_vowel_at(const std::string& word, size_t position) {
+    for (const char* vowel : RUSSIAN_VOWELS) {
+        if (word.compare(position, 2, vowel) == 0) {
+            return true;
+        }
+    }
+    return false;
+}
+
+// Removes the longest ending of either group. Endings of the first group
+// only count after "а" or "я", as in the Snowball definition.
+template <size_t N1, size_t N2>
+bool remove_grouped_ending(std::string& word, size_t region_start, const char* const (&group_1)[N1], const char* const (&group_2)[N2]) {
+    size_t length_1 = longest_ending(word, region_start, group_1);
+    size_t length_2 = longest_ending(word, region_start, group_2);
+    if (length_2 >= length_1 && length_2 > 0) {
+        word.erase(word.length() - length_2);
+        return true;
+    }
+    if (length_1 == 0) {
+        return false;
+    }
+    size_t start = word.length() - length_1;
+    if (start < region_start + 2 || (word.compare(start - 2, 2, "а") != 0 && word.compare(start - 2, 2, "я") != 0)) {
+        return false;
+    }
+    word.erase(start);
+    return true;
+}
+
+template <size_t N>
+bool remove_ending(std::string& word, size_t region_start, const char* const (&endings)[N]) {
+    size_t length = longest_ending(word, region_start, endings);
+    word.erase(word.length() - length);
+    return length > 0;
+}
+
+size_t next_russian_region(const std::string& word, size_t from) {
+    size_t position = from;
+    while (position + 2 <= word.length() && !is_russian_vowel_at(word, position)) {
+        position += 2;
+    }
+    while (position + 2 <= word.length() && is_russian_vowel_at(word, position)) {
+        position += 2;
+    }
+    return position + 2 <= word.length() ? position + 2 : word.length();
+}
+
+std::string stem_russian(const std::string& word) {
+    std::string s = word;
+    for (size_t i = 0; i + 2 <= s.length(); i += 2) {
+        if (s.compare(i, 2, "ё") == 0) {
+            s.replace(i, 2, "е");
+        }
+    }
+    size_t rv = 0;
+    while (rv + 2 <= s.length() && !is_russian_vowel_at(s, rv)) {
+        rv += 2;
+    }
+    rv = rv + 2 <= s.length() ? rv + 2 : s.length();
+    size_t r2 = next_russian_region(s, next_russian_region(s, 0));
+
+    if (!remove_grouped_ending(s, rv, PERFECTIVE_GERUND_1, PERFECTIVE_GERUND_2)) {
+        remove_ending(s, rv, REFLEXIVE_ENDINGS);
+        if (remove_ending(s, rv, ADJECTIVE_ENDINGS)) {
+            remove_grouped_ending(s, rv, PARTICIPLE_1, PARTICIPLE_2);
+        } else if (!remove_grouped_ending(s, rv, VERB_1, VERB_2)) {
+            remove_ending(s, rv, NOUN_ENDINGS);
+        }
+    }
+
+    if (s.length() >= rv + 2 && s.compare(s.length() - 2, 2, "и") == 0) {
+        s.erase(s.length() - 2);
+    }
+    remove_ending(s, r2, DERIVATIONAL_ENDINGS);
+
+    if (s.length() >= rv + 4 && s.compare(s.length() - 4, 4, "нн") == 0) {
+        s.erase(s.length() - 2);
+    } else if (remove_ending(s, rv, SUPERLATIVE_ENDINGS)) {
+        if (s.length() >= rv + 4 && s.compare(s.length() - 4, 4, "нн") == 0) {
+            s.erase(s.length() - 2);
+        }
+    } else if (s.length() >= rv + 2 && s.compare(s.length() - 2, 2, "ь") == 0) {
+        s.erase(s.length() - 2);
+    }
+    return s;
+}
+
+bool is_cyrillic_word(const std::string& word) {
+    if (word.empty() || word.length() % 2 != 0) {
+        return false;
+    }
+    for (size_t i = 0; i < word.length(); i += 2) {
+        unsigned char c = static_cast<unsigned char>(word[i]);
+        if (c != 0xD0 && c != 0xD1) {
+            return false;
+        }
+    }
+    return true;
+}
+
+std::string stem(const std::string& word) {
+    int flags = get_normalization_flags();
+    if (is_cyrillic_word(word)) {
+        return flags & NORMALIZE_STEM_RUSSIAN ? stem_russian(word) : word;
+    }
+    return flags & NORMALIZE_STEM_ENGLISH ? stem_english(word) : word;
+}
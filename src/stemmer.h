@@ -4,6 +4,8 @@
 #include <string>
 
 std::string stem(const std::string& word);
+std::string stem_english(const std::string& word);
+std::string stem_russian(const std::string& word);
 
 #endif // STEMMER_H
 
@@ -0,0 +1,798 @@
+#include "term_dictionary.h"
+#include "boolean_index.h"
+#include "posting_list.h"
+#include "stemmer.h"
+#include "tokenizer.h"
+#include <string>
+#include <vector>
+#include <cstdlib>
+#include <cstring>
+#include <atomic>
+#include <mutex>
+
+IndexEntryNode** sorted_terms = nullptr;
+IndexEntryNode** reversed_terms = nullptr;
+int term_dictionary_size = 0;
+// The sorted terms packed back to back, so the fuzzy walk reads them
+// sequentially instead of chasing an IndexEntryNode per term.
+char* sorted_term_bytes = nullptr;
+int* sorted_term_offsets = nullptr;
+// Readers check the flag without locking; building and freeing the arrays
+// happen under the mutex, so concurrent first queries build them only once.
+std::atomic<bool> term_dictionary_valid(false);
+std::mutex term_dictionary_mutex;
+
+TrigramNode* trigram_table[TRIGRAM_HASHTABLE_SIZE] = {nullptr};
+
+int max_wildcard_expansions = DEFAULT_MAX_WILDCARD_EXPANSIONS;
+
+int compare_terms(const void* a, const void* b) {
+    const IndexEntryNode* entry_a = *static_cast<IndexEntryNode* const*>(a);
+    const IndexEntryNode* entry_b = *static_cast<IndexEntryNode* const*>(b);
+    return entry_a->term.compare(entry_b->term);
+}
+
+int compare_reversed_terms(const void* a, const void* b) {
+    const std::string& term_a = (*static_cast<IndexEntryNode* const*>(a))->term;
+    const std::string& term_b = (*static_cast<IndexEntryNode* const*>(b))->term;
+    size_t len_a = term_a.length();
+    size_t len_b = term_b.length();
+    for (size_t i = 0; i < len_a && i < len_b; ++i) {
+        unsigned char c_a = term_a[len_a - 1 - i];
+        unsigned char c_b = term_b[len_b - 1 - i];
+        if (c_a != c_b) {
+            return c_a < c_b ? -1 : 1;
+        }
+    }
+    if (len_a == len_b) {
+        return 0;
+    }
+    return len_a < len_b ? -1 : 1;
+}
+
+int compare_term_prefix(const std::string& term, const std::string& prefix) {
+    return term.compare(0, prefix.length(), prefix);
+}
+
+int compare_term_suffix(const std::string& term, const std::string& suffix) {
+    size_t term_len = term.length();
+    size_t suffix_len = suffix.length();
+    for (size_t i = 0; i < suffix_len; ++i) {
+        if (i >= term_len) {
+            return -1;
+        }
+        unsigned char c_term = term[term_len - 1 - i];
+        unsigned char c_suffix = suffix[suffix_len - 1 - i];
+        if (c_term != c_suffix) {
+            return c_term < c_suffix ? -1 : 1;
+        }
+    }
+    return 0;
+}
+
+// Finds the block of entries in a sorted array whose prefix (or suffix, for
+// the reversed array) equals key. Returns the block as [begin, end).
+void find_term_range(IndexEntryNode** terms, const std::string& key, bool by_suffix, int& begin, int& end) {
+    int low = 0;
+    int high = term_dictionary_size;
+    while (low < high) {
+        int mid = low + (high - low) / 2;
+        int cmp = by_suffix ? compare_term_suffix(terms[mid]->term, key) : compare_term_prefix(terms[mid]->term, key);
+        if (cmp < 0) {
+            low = mid + 1;
+        } else {
+            high = mid;
+        }
+    }
+    begin = low;
+
+    high = term_dictionary_size;
+    while (low < high) {
+        int mid = low + (high - low) / 2;
+        int cmp = by_suffix ? compare_term_suffix(terms[mid]->term, key) : compare_term_prefix(terms[mid]->term, key);
+        if (cmp <= 0) {
+            low = mid + 1;
+        } else {
+            high = mid;
+        }
+    }
+    end = low;
+}
+
+unsigned int pack_trigram(unsigned char a, unsigned char b, unsigned char c) {
+    return (static_cast<unsigned int>(a) << 16) | (static_cast<unsigned int>(b) << 8) | c;
+}
+
+unsigned int trigram_bucket(unsigned int trigram) {
+    return (trigram * 2654435761u) % TRIGRAM_HASHTABLE_SIZE;
+}
+
+TrigramNode* find_trigram(unsigned int trigram) {
+    TrigramNode* current = trigram_table[trigram_bucket(trigram)];
+    while (current != nullptr) {
+        if (current->trigram == trigram) {
+            return current;
+        }
+        current = current->next;
+    }
+    return nullptr;
+}
+
+void add_trigram_posting(unsigned int trigram, int term_id) {
+    TrigramNode* node = find_trigram(trigram);
+    if (node == nullptr) {
+        unsigned int bucket = trigram_bucket(trigram);
+        node = new TrigramNode();
+        node->trigram = trigram;
+        node->capacity = 4;
+        node->count = 0;
+        node->term_ids = new int[node->capacity];
+        node->next = trigram_table[bucket];
+        trigram_table[bucket] = node;
+    }
+    if (node->count > 0 && node->term_ids[node->count - 1] == term_id) {
+        return;
+    }
+    if (node->count == node->capacity) {
+        int* grown = new int[node->capacity * 2];
+        for (int i = 0; i < node->count; ++i) {
+            grown[i] = node->term_ids[i];
+        }
+        delete[] node->term_ids;
+        node->term_ids = grown;
+        node->capacity *= 2;
+    }
+    node->term_ids[node->count++] = term_id;
+}
+
+void free_term_dictionary() {
+    delete[] sorted_terms;
+    delete[] reversed_terms;
+    delete[] sorted_term_bytes;
+    delete[] sorted_term_offsets;
+    sorted_terms = nullptr;
+    reversed_terms = nullptr;
+    sorted_term_bytes = nullptr;
+    sorted_term_offsets = nullptr;
+    term_dictionary_size = 0;
+    term_dictionary_valid = false;
+
+    for (int i = 0; i < TRIGRAM_HASHTABLE_SIZE; ++i) {
+        TrigramNode* current = trigram_table[i];
+        while (current != nullptr) {
+            TrigramNode* to_delete = current;
+            current = current->next;
+            delete[] to_delete->term_ids;
+            delete to_delete;
+        }
+        trigram_table[i] = nullptr;
+    }
+}
+
+extern "C" void cleanup_term_dictionary() {
+    std::lock_guard<std::mutex> lock(term_dictionary_mutex);
+    free_term_dictionary();
+}
+
+extern "C" void invalidate_term_dictionary() {
+    term_dictionary_valid = false;
+}
+
+void build_term_dictionary_locked() {
+    free_term_dictionary();
+
+    int count = 0;
+    for (int i = 0; i < INVERTED_INDEX_HASHTABLE_SIZE; ++i) {
+        for (IndexEntryNode* entry = inverted_index_table[i]; entry != nullptr; entry = entry->next) {
+            count++;
+        }
+    }
+
+    sorted_terms = new IndexEntryNode*[count > 0 ? count : 1];
+    reversed_terms = new IndexEntryNode*[count > 0 ? count : 1];
+    int position = 0;
+    for (int i = 0; i < INVERTED_INDEX_HASHTABLE_SIZE; ++i) {
+        for (IndexEntryNode* entry = inverted_index_table[i]; entry != nullptr; entry = entry->next) {
+            sorted_terms[position] = entry;
+            reversed_terms[position] = entry;
+            position++;
+        }
+    }
+    term_dictionary_size = count;
+
+    std::qsort(sorted_terms, count, sizeof(IndexEntryNode*), compare_terms);
+    std::qsort(reversed_terms, count, sizeof(IndexEntryNode*), compare_reversed_terms);
+
+    sorted_term_offsets = new int[count + 1];
+    int total_length = 0;
+    for (int term_id = 0; term_id < count; ++term_id) {
+        sorted_term_offsets[term_id] = total_length;
+        total_length += sorted_terms[term_id]->term.length();
+    }
+    sorted_term_offsets[count] = total_length;
+    sorted_term_bytes = new char[total_length > 0 ? total_length : 1];
+    for (int term_id = 0; term_id < count; ++term_id) {
+        const std::string& term = sorted_terms[term_id]->term;
+        term.copy(sorted_term_bytes + sorted_term_offsets[term_id], term.length());
+    }
+
+    for (int term_id = 0; term_id < count; ++term_id) {
+        std::string padded = "$" + sorted_terms[term_id]->term + "$";
+        for (size_t i = 0; i + 2 < padded.length(); ++i) {
+            add_trigram_posting(pack_trigram(padded[i], padded[i + 1], padded[i + 2]), term_id);
+        }
+    }
+
+    term_dictionary_valid = true;
+}
+
+extern "C" void build_term_dictionary() {
+    std::lock_guard<std::mutex> lock(term_dictionary_mutex);
+    build_term_dictionary_locked();
+}
+
+void ensure_term_dictionary() {
+    if (term_dictionary_valid) {
+        return;
+    }
+    std::lock_guard<std::mutex> lock(term_dictionary_mutex);
+    if (!term_dictionary_valid) {
+        build_term_dictionary_locked();
+    }
+}
+
+extern "C" int get_term_dictionary_size() {
+    ensure_term_dictionary();
+    return term_dictionary_size;
+}
+
+extern "C" void set_max_wildcard_expansions(int max_expansions) {
+    max_wildcard_expansions = max_expansions > 0 ? max_expansions : DEFAULT_MAX_WILDCARD_EXPANSIONS;
+}
+
+bool is_wildcard_term(const std::string& term) {
+    return term.find('*') != std::string::npos;
+}
+
+bool wildcard_match(const char* pattern, const char* term) {
+    const char* star = nullptr;
+    const char* resume = nullptr;
+    while (*term != '\0') {
+        if (*pattern == '*') {
+            star = pattern++;
+            resume = term;
+        } else if (*pattern == *term) {
+            pattern++;
+            term++;
+        } else if (star != nullptr) {
+            pattern = star + 1;
+            term = ++resume;
+        } else {
+            return false;
+        }
+    }
+    while (*pattern == '*') {
+        pattern++;
+    }
+    return *pattern == '\0';
+}
+
+// Intersects the trigram lists implied by the fixed parts of the pattern.
+// Returns the number of candidate term ids written to candidates, or -1 when
+// the pattern has no fixed part long enough to form a trigram.
+int collect_trigram_candidates(const std::string& pattern, int* candidates) {
+    std::string padded = (pattern[0] == '*' ? "" : "$") + pattern + (pattern[pattern.length() - 1] == '*' ? "" : "$");
+    int candidate_count = -1;
+    size_t segment_start = 0;
+    while (segment_start < padded.length()) {
+        size_t segment_end = padded.find('*', segment_start);
+        if (segment_end == std::string::npos) {
+            segment_end = padded.length();
+        }
+        for (size_t i = segment_start; i + 2 < segment_end; ++i) {
+            TrigramNode* node = find_trigram(pack_trigram(padded[i], padded[i + 1], padded[i + 2]));
+            if (node == nullptr) {
+                return 0;
+            }
+            if (candidate_count < 0) {
+                for (int j = 0; j < node->count; ++j) {
+                    candidates[j] = node->term_ids[j];
+                }
+                candidate_count = node->count;
+                continue;
+            }
+            int kept = 0;
+            int j = 0;
+            for (int k = 0; k < candidate_count; ++k) {
+                while (j < node->count && node->term_ids[j] < candidates[k]) {
+                    j++;
+                }
+                if (j < node->count && node->term_ids[j] == candidates[k]) {
+                    candidates[kept++] = candidates[k];
+                }
+            }
+            candidate_count = kept;
+            if (candidate_count == 0) {
+                return 0;
+            }
+        }
+        segment_start = segment_end + 1;
+    }
+    return candidate_count;
+}
+
+// The index holds stems, so a pattern ending in a fixed part is stemmed the
+// same way a plain query word would be ("*ology" must find "biologi").
+std::string stem_wildcard_pattern(const std::string& pattern) {
+    std::string stemmed = stem(pattern);
+    if (stemmed.empty() || (stemmed[stemmed.length() - 1] == '*' && pattern[pattern.length() - 1] != '*')) {
+        return pattern;
+    }
+    return stemmed;
+}
+
+// A pattern ending in '*' is not stemmed, so its fixed part may be a whole
+// word that was only indexed as a shorter stem ("philosophy*" must find
+// "philosophi"). Returns the pattern with that part stemmed, or an empty
+// string if stemming does not change it.
+std::string stem_wildcard_prefix(const std::string& pattern) {
+    size_t body_end = pattern.find_last_not_of('*');
+    if (body_end == std::string::npos || body_end + 1 == pattern.length()) {
+        return "";
+    }
+    size_t segment_start = pattern.rfind('*', body_end);
+    segment_start = segment_start == std::string::npos ? 0 : segment_start + 1;
+    std::string segment = pattern.substr(segment_start, body_end + 1 - segment_start);
+    std::string stemmed = stem(segment);
+    if (stemmed.empty() || stemmed == segment) {
+        return "";
+    }
+    return pattern.substr(0, segment_start) + stemmed + "*";
+}
+
+// Appends the terms matching an already stemmed pattern, skipping those that
+// also match `covered` (the terms of a pattern collected before).
+void collect_wildcard_pattern_terms(const std::string& pattern, const std::string& covered, std::vector<IndexEntryNode*>& terms) {
+    size_t first_star = pattern.find('*');
+    size_t last_star = pattern.rfind('*');
+    std::string prefix = pattern.substr(0, first_star);
+    std::string suffix = pattern.substr(last_star + 1);
+
+    IndexEntryNode** range_terms = sorted_terms;
+    int range_begin = 0;
+    int range_end = term_dictionary_size;
+    if (!prefix.empty()) {
+        find_term_range(sorted_terms, prefix, false, range_begin, range_end);
+    }
+    if (!suffix.empty()) {
+        int suffix_begin = 0;
+        int suffix_end = 0;
+        find_term_range(reversed_terms, suffix, true, suffix_begin, suffix_end);
+        if (prefix.empty() || suffix_end - suffix_begin < range_end - range_begin) {
+            range_terms = reversed_terms;
+            range_begin = suffix_begin;
+            range_end = suffix_end;
+        }
+    }
+
+    int* candidates = new int[term_dictionary_size];
+    int candidate_count = -1;
+    if (range_end - range_begin > 0) {
+        candidate_count = collect_trigram_candidates(pattern, candidates);
+    }
+
+    if (candidate_count >= 0 && candidate_count < range_end - range_begin) {
+        for (int i = 0; i < candidate_count && static_cast<int>(terms.size()) < max_wildcard_expansions; ++i) {
+            IndexEntryNode* entry = sorted_terms[candidates[i]];
+            if (wildcard_match(pattern.c_str(), entry->term.c_str()) &&
+                (covered.empty() || !wildcard_match(covered.c_str(), entry->term.c_str()))) {
+                terms.push_back(entry);
+            }
+        }
+    } else {
+        for (int i = range_begin; i < range_end && static_cast<int>(terms.size()) < max_wildcard_expansions; ++i) {
+            IndexEntryNode* entry = range_terms[i];
+            if (wildcard_match(pattern.c_str(), entry->term.c_str()) &&
+                (covered.empty() || !wildcard_match(covered.c_str(), entry->term.c_str()))) {
+                terms.push_back(entry);
+            }
+        }
+    }
+
+    delete[] candidates;
+}
+
+void collect_wildcard_terms(const std::string& raw_pattern, std::vector<IndexEntryNode*>& terms) {
+    ensure_term_dictionary();
+    terms.clear();
+    if (raw_pattern.empty() || term_dictionary_size == 0) {
+        return;
+    }
+    std::string pattern = stem_wildcard_pattern(raw_pattern);
+    std::string stemmed_prefix_pattern = stem_wildcard_prefix(pattern);
+    if (!stemmed_prefix_pattern.empty()) {
+        collect_wildcard_pattern_terms(stemmed_prefix_pattern, "", terms);
+    }
+    collect_wildcard_pattern_terms(pattern, stemmed_prefix_pattern, terms);
+}
+
+PostingList* expand_wildcard_term(const std::string& raw_pattern) {
+    PostingList* result = create_posting_list();
+    std::vector<IndexEntryNode*> terms;
+    collect_wildcard_terms(raw_pattern, terms);
+    for (IndexEntryNode* entry : terms) {
+        posting_list_or_inplace(result, entry->postings);
+    }
+    return result;
+}
+
+struct FuzzyMatch {
+    int term_id;
+    int distance;
+    int doc_freq;
+};
+
+int compare_fuzzy_matches(const void* a, const void* b) {
+    const FuzzyMatch* match_a = static_cast<const FuzzyMatch*>(a);
+    const FuzzyMatch* match_b = static_cast<const FuzzyMatch*>(b);
+    if (match_a->distance != match_b->distance) {
+        return match_a->distance - match_b->distance;
+    }
+    if (match_a->doc_freq != match_b->doc_freq) {
+        return match_b->doc_freq - match_a->doc_freq;
+    }
+    return match_a->term_id - match_b->term_id;
+}
+
+// Distances are counted in code points, so "книга" is one edit from
+// "книги" even though the differing letters are two bytes long.
+void decode_code_points(const char* text, int length, std::vector<unsigned int>& code_points) {
+    code_points.clear();
+    const unsigned char* data = reinterpret_cast<const unsigned char*>(text);
+    int position = 0;
+    while (position < length) {
+        unsigned int code_point = 0;
+        position += decode_utf8(data + position, length - position, code_point);
+        code_points.push_back(code_point);
+    }
+}
+
+// Fills row with the Levenshtein distances between every prefix of word and
+// a term prefix one code point longer than the one above describes. Returns
+// the smallest value in the row.
+int extend_edit_distance_row(const std::vector<unsigned int>& word, const int* above, int* row, unsigned int c) {
+    int word_len = word.size();
+    row[0] = above[0] + 1;
+    int row_min = row[0];
+    for (int j = 1; j <= word_len; ++j) {
+        int best = above[j - 1] + (word[j - 1] == c ? 0 : 1);
+        if (above[j] + 1 < best) {
+            best = above[j] + 1;
+        }
+        if (row[j - 1] + 1 < best) {
+            best = row[j - 1] + 1;
+        }
+        row[j] = best;
+        if (best < row_min) {
+            row_min = best;
+        }
+    }
+    return row_min;
+}
+
+// Levenshtein distance between word and term. Gives up as soon as the
+// distance is known to exceed max_distance and returns max_distance + 1.
+int bounded_edit_distance(const std::vector<unsigned int>& word, const std::string& term, int max_distance,
+                          std::vector<int>& rows, std::vector<unsigned int>& term_chars) {
+    decode_code_points(term.data(), term.length(), term_chars);
+    int word_len = word.size();
+    int term_len = term_chars.size();
+    if (word_len - term_len > max_distance || term_len - word_len > max_distance) {
+        return max_distance + 1;
+    }
+    rows.resize(2 * (word_len + 1));
+    int* above = &rows[0];
+    int* row = &rows[word_len + 1];
+    for (int j = 0; j <= word_len; ++j) {
+        above[j] = j;
+    }
+    for (int i = 0; i < term_len; ++i) {
+        if (extend_edit_distance_row(word, above, row, term_chars[i]) > max_distance) {
+            return max_distance + 1;
+        }
+        int* swap = above;
+        above = row;
+        row = swap;
+    }
+    return above[word_len] <= max_distance ? above[word_len] : max_distance + 1;
+}
+
+void add_fuzzy_match(std::vector<FuzzyMatch>& matches, int term_id, int distance) {
+    FuzzyMatch match;
+    match.term_id = term_id;
+    match.distance = distance;
+    match.doc_freq = posting_list_cardinality(sorted_terms[term_id]->postings);
+    matches.push_back(match);
+}
+
+// Verifies only the terms found on at least min_shared of the word's trigram
+// lists. The lists are sorted by term id, so they are merged directly.
+void find_fuzzy_matches_by_trigrams(const std::vector<unsigned int>& word, const std::vector<unsigned int>& grams, int min_shared,
+                                    int max_distance, std::vector<FuzzyMatch>& matches) {
+    std::vector<TrigramNode*> lists;
+    for (size_t i = 0; i < grams.size(); ++i) {
+        TrigramNode* node = find_trigram(grams[i]);
+        if (node != nullptr) {
+            lists.push_back(node);
+        }
+    }
+    if (static_cast<int>(lists.size()) < min_shared) {
+        return;
+    }
+
+    std::vector<int> cursors(lists.size(), 0);
+    std::vector<int> rows;
+    std::vector<unsigned int> term_chars;
+    while (true) {
+        int term_id = term_dictionary_size;
+        for (size_t i = 0; i < lists.size(); ++i) {
+            if (cursors[i] < lists[i]->count && lists[i]->term_ids[cursors[i]] < term_id) {
+                term_id = lists[i]->term_ids[cursors[i]];
+            }
+        }
+        if (term_id == term_dictionary_size) {
+            break;
+        }
+        int shared = 0;
+        for (size_t i = 0; i < lists.size(); ++i) {
+            if (cursors[i] < lists[i]->count && lists[i]->term_ids[cursors[i]] == term_id) {
+                cursors[i]++;
+                shared++;
+            }
+        }
+        if (shared >= min_shared) {
+            int distance = bounded_edit_distance(word, sorted_terms[term_id]->term, max_distance, rows, term_chars);
+            if (distance <= max_distance) {
+                add_fuzzy_match(matches, term_id, distance);
+            }
+        }
+    }
+}
+
+// True when the sorted term at term_id starts with the prefix_len bytes at prefix.
+bool sorted_term_has_prefix(int term_id, const char* prefix, int prefix_len) {
+    return sorted_term_offsets[term_id + 1] - sorted_term_offsets[term_id] >= prefix_len &&
+           std::memcmp(sorted_term_bytes + sorted_term_offsets[term_id], prefix, prefix_len) == 0;
+}
+
+// Returns one past the last term after from that starts with the prefix_len
+// bytes at prefix. Gallops before the binary search because the subtrees
+// pruned by the fuzzy walk are usually only a few terms long.
+int skip_term_prefix(int from, const char* prefix, int prefix_len) {
+    int low = from;
+    int step = 1;
+    int high = from + 1;
+    while (high < term_dictionary_size && sorted_term_has_prefix(high, prefix, prefix_len)) {
+        low = high;
+        step *= 2;
+        high = from + step;
+    }
+    if (high > term_dictionary_size) {
+        high = term_dictionary_size;
+    }
+    low++;
+    while (low < high) {
+        int mid = low + (high - low) / 2;
+        if (sorted_term_has_prefix(mid, prefix, prefix_len)) {
+            low = mid + 1;
+        } else {
+            high = mid;
+        }
+    }
+    return low;
+}
+
+// Walks the sorted dictionary as an implicit trie. Each term reuses the rows
+// of the prefix it shares with the previous one, and once a prefix is more
+// than max_distance edits from every prefix of word, all terms starting with
+// it are skipped.
+void find_fuzzy_matches_by_walk(const std::vector<unsigned int>& word, int max_distance, std::vector<FuzzyMatch>& matches) {
+    int row_len = word.size() + 1;
+    // A prefix longer than the word by more than max_distance code points is
+    // always pruned, so no more rows than that plus the pruning one are needed.
+    int max_depth = word.size() + max_distance + 1;
+    std::vector<int> rows((max_depth + 1) * row_len);
+    for (int j = 0; j < row_len; ++j) {
+        rows[j] = j;
+    }
+    // prefix_bytes[d] is the byte length of the first d code points of the
+    // previous term.
+    std::vector<int> prefix_bytes(max_depth + 1, 0);
+
+    const char* previous = nullptr;
+    int depth = 0;
+    int term_id = 0;
+    while (term_id < term_dictionary_size) {
+        const char* term = sorted_term_bytes + sorted_term_offsets[term_id];
+        int term_len = sorted_term_offsets[term_id + 1] - sorted_term_offsets[term_id];
+        int shared = 0;
+        if (previous != nullptr) {
+            int limit = prefix_bytes[depth] < term_len ? prefix_bytes[depth] : term_len;
+            while (shared < limit && previous[shared] == term[shared]) {
+                shared++;
+            }
+        }
+        while (prefix_bytes[depth] > shared) {
+            depth--;
+        }
+
+        bool pruned = false;
+        int position = prefix_bytes[depth];
+        while (position < term_len) {
+            unsigned int code_point = static_cast<unsigned char>(term[position]);
+            position += code_point < 0x80 ? 1 : decode_utf8(reinterpret_cast<const unsigned char*>(term) + position, term_len - position, code_point);
+            int row_min = extend_edit_distance_row(word, &rows[depth * row_len], &rows[(depth + 1) * row_len], code_point);
+            depth++;
+            prefix_bytes[depth] = position;
+            if (row_min > max_distance) {
+                pruned = true;
+                break;
+            }
+        }
+        previous = term;
+
+        if (pruned) {
+            term_id = skip_term_prefix(term_id, term, position);
+            continue;
+        }
+        int distance = rows[depth * row_len + row_len - 1];
+        if (distance <= max_distance) {
+            add_fuzzy_match(matches, term_id, distance);
+        }
+        term_id++;
+    }
+}
+
+// Collects every dictionary term within max_distance edits of word, ordered
+// by distance and then by document frequency. One edit removes at most the
+// word's byte trigrams overlapping the edited character, so a term within k
+// edits shares all but k * (longest character + 2) of them; when that bound
+// leaves nothing to filter on (short words), the dictionary is walked as a
+// trie instead.
+int find_fuzzy_matches(const std::string& word, int max_distance, std::vector<FuzzyMatch>& matches) {
+    ensure_term_dictionary();
+    matches.clear();
+    if (word.empty() || term_dictionary_size == 0) {
+        return 0;
+    }
+    std::vector<unsigned int> word_chars;
+    decode_code_points(word.data(), word.length(), word_chars);
+
+    std::string padded = "$" + word + "$";
+    std::vector<unsigned int> grams;
+    for (size_t i = 0; i + 2 < padded.length(); ++i) {
+        unsigned int gram = pack_trigram(padded[i], padded[i + 1], padded[i + 2]);
+        bool seen = false;
+        for (size_t j = 0; j < grams.size(); ++j) {
+            if (grams[j] == gram) {
+                seen = true;
+                break;
+            }
+        }
+        if (!seen) {
+            grams.push_back(gram);
+        }
+    }
+    int longest_char = 1;
+    for (unsigned int code_point : word_chars) {
+        int char_length = code_point < 0x80 ? 1 : code_point < 0x800 ? 2 : code_point < 0x10000 ? 3 : 4;
+        if (char_length > longest_char) {
+            longest_char = char_length;
+        }
+    }
+    int min_shared = static_cast<int>(grams.size()) - (longest_char + 2) * max_distance;
+
+    if (min_shared > 0) {
+        find_fuzzy_matches_by_trigrams(word_chars, grams, min_shared, max_distance, matches);
+    } else {
+        find_fuzzy_matches_by_walk(word_chars, max_distance, matches);
+    }
+
+    if (!matches.empty()) {
+        std::qsort(matches.data(), matches.size(), sizeof(FuzzyMatch), compare_fuzzy_matches);
+    }
+    return matches.size();
+}
+
+int clamp_fuzzy_distance(int max_distance) {
+    if (max_distance < 0) {
+        return 0;
+    }
+    return max_distance > MAX_FUZZY_DISTANCE ? MAX_FUZZY_DISTANCE : max_distance;
+}
+
+bool parse_fuzzy_term(const std::string& token, std::string& word, int& max_distance) {
+    size_t tilde = token.rfind('~');
+    if (tilde == std::string::npos || tilde == 0) {
+        return false;
+    }
+    std::string distance_str = token.substr(tilde + 1);
+    max_distance = DEFAULT_FUZZY_MAX_DISTANCE;
+    if (!distance_str.empty()) {
+        if (distance_str.length() != 1 || distance_str[0] < '0' || distance_str[0] > '9') {
+            return false;
+        }
+        max_distance = distance_str[0] - '0';
+    }
+    max_distance = clamp_fuzzy_distance(max_distance);
+    word = token.substr(0, tilde);
+    return true;
+}
+
+void collect_fuzzy_terms(const std::string& word, int max_distance, std::vector<IndexEntryNode*>& terms) {
+    terms.clear();
+    std::string stemmed_word = stem(word);
+    if (stemmed_word.empty()) {
+        return;
+    }
+
+    std::vector<FuzzyMatch> matches;
+    int match_count = find_fuzzy_matches(stemmed_word, clamp_fuzzy_distance(max_distance), matches);
+    for (int i = 0; i < match_count && i < max_wildcard_expansions; ++i) {
+        terms.push_back(sorted_terms[matches[i].term_id]);
+    }
+}
+
+PostingList* expand_fuzzy_term(const std::string& word, int max_distance) {
+    PostingList* result = create_posting_list();
+    std::vector<IndexEntryNode*> terms;
+    collect_fuzzy_terms(word, max_distance, terms);
+    for (IndexEntryNode* entry : terms) {
+        posting_list_or_inplace(result, entry->postings);
+    }
+    return result;
+}
+
+extern "C" SuggestionNode* suggest_terms(const char* word_cstr, int max_distance, int max_suggestions) {
+    std::string stemmed_word = stem(normalize_term(word_cstr));
+    if (stemmed_word.empty()) {
+        return nullptr;
+    }
+
+    std::vector<FuzzyMatch> matches;
+    int match_count = find_fuzzy_matches(stemmed_word, clamp_fuzzy_distance(max_distance), matches);
+    SuggestionNode* head = nullptr;
+    SuggestionNode* tail = nullptr;
+    for (int i = 0; i < match_count && i < max_suggestions; ++i) {
+        IndexEntryNode* entry = sorted_terms[matches[i].term_id];
+        const std::string& surface = entry->surface.empty() ? entry->term : entry->surface;
+        SuggestionNode* node = new SuggestionNode();
+        node->term = new char[entry->term.length() + 1];
+        entry->term.copy(node->term, entry->term.length());
+        node->term[entry->term.length()] = '\0';
+        node->surface = new char[surface.length() + 1];
+        surface.copy(node->surface, surface.length());
+        node->surface[surface.length()] = '\0';
+        node->distance = matches[i].distance;
+        node->doc_freq = matches[i].doc_freq;
+        node->next = nullptr;
+        if (head == nullptr) {
+            head = node;
+        } else {
+            tail->next = node;
+        }
+        tail = node;
+    }
+    return head;
+}
+
+extern "C" void free_suggestion_list(SuggestionNode* head) {
+    SuggestionNode* current = head;
+    while (current != nullptr) {
+        SuggestionNode* to_delete = current;
+        current = current->next;
+        delete[] to_delete->term;
+        delete[] to_delete->surface;
+        delete to_delete;
+    }
+}
@@ -0,0 +1,47 @@
+#ifndef TERM_DICTIONARY_H
+#define TERM_DICTIONARY_H
+
+#include <string>
+#include <vector>
+#include "boolean_index.h"
+#include "posting_list.h"
+
+const int DEFAULT_MAX_WILDCARD_EXPANSIONS = 128;
+const int TRIGRAM_HASHTABLE_SIZE = 65536;
+const int DEFAULT_FUZZY_MAX_DISTANCE = 2;
+const int MAX_FUZZY_DISTANCE = 2;
+
+struct TrigramNode {
+    unsigned int trigram;
+    int* term_ids;
+    int count;
+    int capacity;
+    TrigramNode* next;
+};
+
+struct SuggestionNode {
+    char* term;
+    char* surface;
+    int distance;
+    int doc_freq;
+    SuggestionNode* next;
+};
+
+extern "C" void build_term_dictionary();
+extern "C" void invalidate_term_dictionary();
+extern "C" void cleanup_term_dictionary();
+extern "C" int get_term_dictionary_size();
+extern "C" void set_max_wildcard_expansions(int max_expansions);
+extern "C" SuggestionNode* suggest_terms(const char* word, int max_distance, int max_suggestions);
+extern "C" void free_suggestion_list(SuggestionNode* head);
+
+bool is_wildcard_term(const std::string& term);
+bool wildcard_match(const char* pattern, const char* term);
+std::string stem_wildcard_pattern(const std::string& pattern);
+void collect_wildcard_terms(const std::string& pattern, std::vector<IndexEntryNode*>& terms);
+PostingList* expand_wildcard_term(const std::string& pattern);
+bool parse_fuzzy_term(const std::string& token, std::string& word, int& max_distance);
+void collect_fuzzy_terms(const std::string& word, int max_distance, std::vector<IndexEntryNode*>& terms);
+PostingList* expand_fuzzy_term(const std::string& word, int max_distance);
+
+#endif // TERM_DICTIONARY_H
@@ -1,29 +1,346 @@
 #include "tokenizer.h"
-#include <sstream>
-#include <algorithm>
-#include <cctype>
 #include <iostream>
+#include <utility>
 
-std::vector<std::string> tokenize(const std::string& text) {
-    std::vector<std::string> tokens;
-    std::string current_token;
-    std::stringstream ss(text);
-    char c;
+#if defined(__AVX2__) || defined(__SSE2__)
+#include <immintrin.h>
+#define HAVE_SIMD_ASCII_SCAN 1
+#endif
 
-    while (ss.get(c)) {
-        if (std::isalnum(static_cast<unsigned char>(c))) {
-            current_token += std::tolower(static_cast<unsigned char>(c));
-        } else {
-            if (!current_token.empty()) {
-                tokens.push_back(current_token);
-                current_token.clear();
+int normalization_flags = DEFAULT_NORMALIZATION_FLAGS;
+
+// Base letters of U+00C0..U+00FF and U+0100..U+017F, a space where the
+// character has none (ligatures, thorn, eszett, the multiplication signs).
+const char LATIN1_BASE_LETTERS[] = "AAAAAA CEEEEIIIIDNOOOOO OUUUUY  aaaaaa ceeeeiiiidnooooo ouuuuy y";
+const char LATIN_EXTENDED_A_BASE_LETTERS[] =
+    "AaAaAaCcCcCcCcDdDdEeEeEeEeEeGgGgGgGgHhHhIiIiIiIiIi  JjKkkLlLlLlLlLlNnNnNnnNnOoOoOo  RrRrRrSsSsSsSsTtTtTtUuUuUuUuUuUuWwYyYZzZzZzs";
+static_assert(sizeof(LATIN1_BASE_LETTERS) == 64 + 1, "one entry per U+00C0..U+00FF");
+static_assert(sizeof(LATIN_EXTENDED_A_BASE_LETTERS) == 128 + 1, "one entry per U+0100..U+017F");
+
+extern "C" void set_normalization_flags(int flags) {
+    normalization_flags = flags;
+}
+
+extern "C" int get_normalization_flags() {
+    return normalization_flags;
+}
+
+int decode_utf8(const unsigned char* data, size_t length, unsigned int& code_point) {
+    unsigned char lead = data[0];
+    int char_length = lead < 0x80 ? 1 : lead < 0xC2 ? 0 : lead < 0xE0 ? 2 : lead < 0xF0 ? 3 : lead < 0xF5 ? 4 : 0;
+    if (char_length == 1) {
+        code_point = lead;
+        return 1;
+    }
+    code_point = 0xFFFD;
+    if (char_length == 0 || static_cast<size_t>(char_length) > length) {
+        return 1;
+    }
+    unsigned int value = lead & (0x7F >> char_length);
+    for (int i = 1; i < char_length; ++i) {
+        if ((data[i] & 0xC0) != 0x80) {
+            return 1;
+        }
+        value = (value << 6) | (data[i] & 0x3F);
+    }
+    bool overlong = (char_length == 3 && value < 0x800) || (char_length == 4 && value < 0x10000);
+    if (overlong || (value >= 0xD800 && value <= 0xDFFF) || value > 0x10FFFF) {
+        return 1;
+    }
+    code_point = value;
+    return char_length;
+}
+
+void append_utf8(std::string& out, unsigned int code_point) {
+    if (code_point < 0x80) {
+        out += static_cast<char>(code_point);
+    } else if (code_point < 0x800) {
+        out += static_cast<char>(0xC0 | (code_point >> 6));
+        out += static_cast<char>(0x80 | (code_point & 0x3F));
+    } else if (code_point < 0x10000) {
+        out += static_cast<char>(0xE0 | (code_point >> 12));
+        out += static_cast<char>(0x80 | ((code_point >> 6) & 0x3F));
+        out += static_cast<char>(0x80 | (code_point & 0x3F));
+    } else {
+        out += static_cast<char>(0xF0 | (code_point >> 18));
+        out += static_cast<char>(0x80 | ((code_point >> 12) & 0x3F));
+        out += static_cast<char>(0x80 | ((code_point >> 6) & 0x3F));
+        out += static_cast<char>(0x80 | (code_point & 0x3F));
+    }
+}
+
+bool is_combining_mark(unsigned int code_point) {
+    return (code_point >= 0x300 && code_point <= 0x36F) || (code_point >= 0x483 && code_point <= 0x489);
+}
+
+bool is_word_code_point(unsigned int code_point) {
+    if (code_point < 0x80) {
+        return (code_point >= '0' && code_point <= '9') || ((code_point | 0x20) >= 'a' && (code_point | 0x20) <= 'z');
+    }
+    if (code_point < 0xC0) {
+        return code_point == 0xAA || code_point == 0xB5 || code_point == 0xBA;
+    }
+    if (code_point <= 0x2AF) {
+        return code_point != 0xD7 && code_point != 0xF7;
+    }
+    if (code_point >= 0x300 && code_point <= 0x3FF) {
+        return code_point != 0x375 && code_point != 0x37E && code_point != 0x384 && code_point != 0x385 && code_point != 0x387;
+    }
+    if (code_point >= 0x400 && code_point <= 0x52F) {
+        return code_point != 0x482;
+    }
+    return (code_point >= 0x531 && code_point <= 0x587)
+        || (code_point >= 0x5D0 && code_point <= 0x5EA)
+        || (code_point >= 0x620 && code_point <= 0x669)
+        || (code_point >= 0x1E00 && code_point <= 0x1FFF)
+        || (code_point >= 0x3040 && code_point <= 0x30FF)
+        || (code_point >= 0x4E00 && code_point <= 0x9FFF)
+        || (code_point >= 0xAC00 && code_point <= 0xD7A3);
+}
+
+// Simple Unicode case folding for Latin, Greek and Cyrillic.
+unsigned int fold_case(unsigned int code_point) {
+    if (code_point < 0x80) {
+        return code_point >= 'A' && code_point <= 'Z' ? code_point + 0x20 : code_point;
+    }
+    if (code_point < 0x100) {
+        if (code_point == 0xB5) {
+            return 0x3BC;
+        }
+        return code_point >= 0xC0 && code_point <= 0xDE && code_point != 0xD7 ? code_point + 0x20 : code_point;
+    }
+    if (code_point < 0x180) {
+        if (code_point == 0x130) {
+            return 'i';
+        }
+        if (code_point == 0x178) {
+            return 0xFF;
+        }
+        if (code_point == 0x17F) {
+            return 's';
+        }
+        if (code_point == 0x138 || code_point == 0x149) {
+            return code_point;
+        }
+        if ((code_point >= 0x139 && code_point <= 0x148) || code_point >= 0x179) {
+            return code_point & 1 ? code_point + 1 : code_point;
+        }
+        return code_point & 1 ? code_point : code_point + 1;
+    }
+    if (code_point >= 0x370 && code_point < 0x400) {
+        if (code_point == 0x386) {
+            return 0x3AC;
+        }
+        if (code_point >= 0x388 && code_point <= 0x38A) {
+            return code_point + 37;
+        }
+        if (code_point == 0x38C) {
+            return 0x3CC;
+        }
+        if (code_point == 0x38E || code_point == 0x38F) {
+            return code_point + 63;
+        }
+        if ((code_point >= 0x391 && code_point <= 0x3A1) || (code_point >= 0x3A3 && code_point <= 0x3AB)) {
+            return code_point + 32;
+        }
+        return code_point == 0x3C2 ? 0x3C3 : code_point;
+    }
+    if (code_point >= 0x400 && code_point < 0x530) {
+        if (code_point < 0x410) {
+            return code_point + 80;
+        }
+        if (code_point < 0x430) {
+            return code_point + 32;
+        }
+        if (code_point == 0x4C0) {
+            return 0x4CF;
+        }
+        if (code_point >= 0x4C1 && code_point <= 0x4CE) {
+            return code_point & 1 ? code_point + 1 : code_point;
+        }
+        if ((code_point >= 0x460 && code_point <= 0x481) || (code_point >= 0x48A && code_point != 0x4CF)) {
+            return code_point & 1 ? code_point : code_point + 1;
+        }
+        return code_point;
+    }
+    if (code_point >= 0x1E00 && code_point <= 0x1EFF) {
+        if (code_point == 0x1E9E) {
+            return 0xDF;
+        }
+        if (code_point <= 0x1E95 || code_point >= 0x1EA0) {
+            return code_point & 1 ? code_point : code_point + 1;
+        }
+    }
+    return code_point;
+}
+
+// Returns the code point without its accent, or 0 for a combining mark
+// that should be dropped.
+unsigned int strip_diacritic(unsigned int code_point) {
+    if (is_combining_mark(code_point)) {
+        return 0;
+    }
+    if (code_point >= 0xC0 && code_point < 0x180) {
+        char base = code_point < 0x100 ? LATIN1_BASE_LETTERS[code_point - 0xC0] : LATIN_EXTENDED_A_BASE_LETTERS[code_point - 0x100];
+        return base != ' ' ? static_cast<unsigned int>(base) : code_point;
+    }
+    if (code_point == 0x401) {
+        return 0x415;
+    }
+    if (code_point == 0x451) {
+        return 0x435;
+    }
+    return code_point;
+}
+
+void append_normalized(std::string& out, unsigned int code_point, int flags) {
+    if (flags & NORMALIZE_CASE_FOLD) {
+        code_point = fold_case(code_point);
+    }
+    if (flags & NORMALIZE_STRIP_DIACRITICS) {
+        code_point = strip_diacritic(code_point);
+        if (code_point == 0) {
+            return;
+        }
+    }
+    append_utf8(out, code_point);
+}
+
+#ifdef HAVE_SIMD_ASCII_SCAN
+// Classifies a block of bytes at once. Returns false if the block holds any
+// non-ASCII byte; otherwise sets bit i of word_mask for each letter or digit
+// and writes the (optionally lowercased) bytes to out.
+#ifdef __AVX2__
+const int ASCII_BLOCK_SIZE = 32;
+const unsigned int ASCII_BLOCK_MASK = 0xFFFFFFFFu;
+
+inline bool scan_ascii_block(const unsigned char* data, bool fold, unsigned int& word_mask, unsigned char* out) {
+    __m256i bytes = _mm256_loadu_si256(reinterpret_cast<const __m256i*>(data));
+    if (_mm256_movemask_epi8(bytes) != 0) {
+        return false;
+    }
+    __m256i lower = _mm256_or_si256(bytes, _mm256_set1_epi8(0x20));
+    __m256i is_alpha = _mm256_and_si256(_mm256_cmpgt_epi8(lower, _mm256_set1_epi8('a' - 1)), _mm256_cmpgt_epi8(_mm256_set1_epi8('z' + 1), lower));
+    __m256i is_digit = _mm256_and_si256(_mm256_cmpgt_epi8(bytes, _mm256_set1_epi8('0' - 1)), _mm256_cmpgt_epi8(_mm256_set1_epi8('9' + 1), bytes));
+    word_mask = static_cast<unsigned int>(_mm256_movemask_epi8(_mm256_or_si256(is_alpha, is_digit)));
+    if (fold) {
+        bytes = _mm256_or_si256(bytes, _mm256_and_si256(is_alpha, _mm256_set1_epi8(0x20)));
+    }
+    _mm256_storeu_si256(reinterpret_cast<__m256i*>(out), bytes);
+    return true;
+}
+#else
+const int ASCII_BLOCK_SIZE = 16;
+const unsigned int ASCII_BLOCK_MASK = 0xFFFFu;
+
+inline bool scan_ascii_block(const unsigned char* data, bool fold, unsigned int& word_mask, unsigned char* out) {
+    __m128i bytes = _mm_loadu_si128(reinterpret_cast<const __m128i*>(data));
+    if (_mm_movemask_epi8(bytes) != 0) {
+        return false;
+    }
+    __m128i lower = _mm_or_si128(bytes, _mm_set1_epi8(0x20));
+    __m128i is_alpha = _mm_and_si128(_mm_cmpgt_epi8(lower, _mm_set1_epi8('a' - 1)), _mm_cmplt_epi8(lower, _mm_set1_epi8('z' + 1)));
+    __m128i is_digit = _mm_and_si128(_mm_cmpgt_epi8(bytes, _mm_set1_epi8('0' - 1)), _mm_cmplt_epi8(bytes, _mm_set1_epi8('9' + 1)));
+    word_mask = static_cast<unsigned int>(_mm_movemask_epi8(_mm_or_si128(is_alpha, is_digit)));
+    if (fold) {
+        bytes = _mm_or_si128(bytes, _mm_and_si128(is_alpha, _mm_set1_epi8(0x20)));
+    }
+    _mm_storeu_si128(reinterpret_cast<__m128i*>(out), bytes);
+    return true;
+}
+#endif
+#endif
+
+std::vector<TokenSpan> tokenize_with_offsets(const std::string& text) {
+    std::vector<TokenSpan> tokens;
+    const unsigned char* data = reinterpret_cast<const unsigned char*>(text.data());
+    size_t length = text.length();
+    tokens.reserve(length / 8);
+    int flags = normalization_flags;
+    TokenSpan current_token;
+    current_token.start = 0;
+    bool in_token = false;
+
+    size_t i = 0;
+    while (i < length) {
+#ifdef HAVE_SIMD_ASCII_SCAN
+        unsigned int word_mask;
+        unsigned char block[ASCII_BLOCK_SIZE];
+        if (i + ASCII_BLOCK_SIZE <= length && scan_ascii_block(data + i, (flags & NORMALIZE_CASE_FOLD) != 0, word_mask, block)) {
+            int position = 0;
+            while (position < ASCII_BLOCK_SIZE) {
+                if (!in_token) {
+                    unsigned int starts = word_mask >> position;
+                    if (starts == 0) {
+                        break;
+                    }
+                    position += __builtin_ctz(starts);
+                    current_token.start = i + position;
+                    in_token = true;
+                } else {
+                    unsigned int ends = (~word_mask & ASCII_BLOCK_MASK) >> position;
+                    int run = ends == 0 ? ASCII_BLOCK_SIZE - position : __builtin_ctz(ends);
+                    current_token.text.append(reinterpret_cast<const char*>(block) + position, run);
+                    position += run;
+                    if (position < ASCII_BLOCK_SIZE) {
+                        current_token.end = i + position;
+                        tokens.push_back(std::move(current_token));
+                        current_token.text.clear();
+                        in_token = false;
+                    }
+                }
+            }
+            i += ASCII_BLOCK_SIZE;
+            continue;
+        }
+#endif
+        unsigned int code_point = data[i];
+        int char_length = code_point < 0x80 ? 1 : decode_utf8(data + i, length - i, code_point);
+        if (is_word_code_point(code_point) && (in_token || !is_combining_mark(code_point))) {
+            if (!in_token) {
+                current_token.start = i;
+                in_token = true;
             }
+            append_normalized(current_token.text, code_point, flags);
+        } else if (in_token) {
+            current_token.end = i;
+            tokens.push_back(std::move(current_token));
+            current_token.text.clear();
+            in_token = false;
         }
+        i += char_length;
     }
-    if (!current_token.empty()) {
-        tokens.push_back(current_token);
+    if (in_token) {
+        current_token.end = length;
+        tokens.push_back(std::move(current_token));
     }
 
     return tokens;
 }
 
+std::vector<std::string> tokenize(const std::string& text) {
+    std::vector<TokenSpan> spans = tokenize_with_offsets(text);
+    std::vector<std::string> tokens;
+    tokens.reserve(spans.size());
+    for (TokenSpan& span : spans) {
+        tokens.push_back(std::move(span.text));
+    }
+    return tokens;
+}
+
+std::string normalize_term(const std::string& term) {
+    const unsigned char* data = reinterpret_cast<const unsigned char*>(term.data());
+    std::string normalized;
+    size_t i = 0;
+    while (i < term.length()) {
+        unsigned int code_point = data[i];
+        int char_length = code_point < 0x80 ? 1 : decode_utf8(data + i, term.length() - i, code_point);
+        if (is_word_code_point(code_point)) {
+            append_normalized(normalized, code_point, normalization_flags);
+        } else {
+            normalized.append(term, i, char_length);
+        }
+        i += char_length;
+    }
+    return normalized;
+}
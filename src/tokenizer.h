@@ -4,7 +4,27 @@
 #include <vector>
 #include <string>
 
+// Normalization steps applied to tokens and query terms. They must be set
+// before documents are indexed and stay the same while the index is queried.
+const int NORMALIZE_CASE_FOLD = 1;
+const int NORMALIZE_STRIP_DIACRITICS = 2;
+const int NORMALIZE_STEM_ENGLISH = 4;
+const int NORMALIZE_STEM_RUSSIAN = 8;
+const int DEFAULT_NORMALIZATION_FLAGS = NORMALIZE_CASE_FOLD | NORMALIZE_STEM_ENGLISH | NORMALIZE_STEM_RUSSIAN;
+
+struct TokenSpan {
+    std::string text;
+    size_t start;
+    size_t end;
+};
+
+extern "C" void set_normalization_flags(int flags);
+extern "C" int get_normalization_flags();
+
 std::vector<std::string> tokenize(const std::string& text);
+std::vector<TokenSpan> tokenize_with_offsets(const std::string& text);
+std::string normalize_term(const std::string& term);
+int decode_utf8(const unsigned char* data, size_t length, unsigned int& code_point);
+void append_utf8(std::string& out, unsigned int code_point);
 
 #endif // TOKENIZER_H
-
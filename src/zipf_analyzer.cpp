@@ -102,3 +102,8 @@ extern "C" void save_zipf_to_csv(const std::vector<WordFrequency>& frequencies,
     outfile.close();
     std::cout << "Zipf's law data saved to " << filename << std::endl;
 }
+
+extern "C" void save_zipf_analysis(const char* filename) {
+    std::vector<WordFrequency> frequencies = analyze_zipf();
+    save_zipf_to_csv(frequencies, filename);
+}
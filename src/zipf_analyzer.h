@@ -13,6 +13,7 @@ extern "C" void init_hash_table();
 extern "C" void add_word_frequency(const std::string& word);
 extern "C" std::vector<WordFrequency> analyze_zipf();
 extern "C" void save_zipf_to_csv(const std::vector<WordFrequency>& frequencies, const char* filename);
+extern "C" void save_zipf_analysis(const char* filename);
 
 
 #endif // ZIPF_ANALYZER_H
\ No newline at end of file
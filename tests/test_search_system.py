@@ -4,7 +4,11 @@ import os
 import json
 import time
 import pymongo
-from ctypes import cdll, c_char_p, c_int, c_void_p, Structure, POINTER, cast
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+from ir_system import Index
 
 # Configuration
 PYTHON_CLI_SCRIPT = "scripts/cli_search.py"
@@ -15,18 +19,6 @@ MONGO_URI = "mongodb://localhost:27017/"
 DATABASE_NAME = "ir_system"
 COLLECTION_NAME = "documents"
 
-class DocListNode(Structure):
-    _fields_ = [("doc_id", c_int),
-                ("next", c_void_p)]
-
-def parse_doc_list(doc_list_ptr):
-    results = []
-    current_node = cast(doc_list_ptr, POINTER(DocListNode))
-    while current_node and current_node.contents.doc_id >= 0:
-        results.append(current_node.contents.doc_id)
-        current_node = cast(current_node.contents.next, POINTER(DocListNode))
-    return results
-
 class TestSearchSystem(unittest.TestCase):
 
     @classmethod
@@ -65,34 +57,23 @@ class TestSearchSystem(unittest.TestCase):
 
         # --- Load C++ library and build index directly in the test runner ---
         try:
-            cls.lib = cdll.LoadLibrary(os.path.join(cls.project_root, "libir_system.so"))
+            cls.index = Index()
         except OSError as e:
             print(f"Error loading libir_system.so in tests: {e}")
             raise
-
-        cls.lib.init_inverted_index.argtypes = []
-        cls.lib.build_index_for_document.argtypes = [c_char_p, c_int]
-        cls.lib.cleanup_inverted_index.argtypes = []
-        cls.lib.boolean_search.argtypes = [c_char_p]
-        cls.lib.boolean_search.restype = c_void_p
-        cls.lib.free_doc_list.argtypes = [c_void_p] # Add argtype for free_doc_list
-
-        cls.lib.init_inverted_index.restype = None
-        cls.lib.build_index_for_document.restype = None
-        cls.lib.cleanup_inverted_index.restype = None
-        cls.lib.free_doc_list.restype = None
-
-
-        cls.lib.init_inverted_index()
         print("C++ Inverted Index Initialized for direct testing.")
+        cls.doc_store_dir = tempfile.TemporaryDirectory()
+        cls.doc_store_path = os.path.join(cls.doc_store_dir.name, "doc_store.bin")
+        cls.index.open_doc_store_writer(cls.doc_store_path)
 
         documents_cursor = cls.collection.find({})
         cls.doc_map = {} # Store basic doc info for display
         for doc_id, document in enumerate(documents_cursor):
             cls.doc_map[doc_id] = {"title": document.get("title", "N/A"), "url": document.get("url", "N/A")}
             if "content" in document:
-                content_bytes = document["content"].encode('utf-8')
-                cls.lib.build_index_for_document(content_bytes, doc_id)
+                cls.index.add_document(doc_id, document["content"])
+        cls.index.close_doc_store_writer()
+        cls.index.open_doc_store(cls.doc_store_path)
         print(f"Index built with {len(cls.doc_map)} documents for direct testing.")
         # --- End C++ library loading and index building ---
 
@@ -100,7 +81,8 @@ class TestSearchSystem(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         # Clean up C++ index memory
-        cls.lib.cleanup_inverted_index()
+        cls.index.close()
+        cls.doc_store_dir.cleanup()
         print("C++ Inverted Index memory cleaned up for direct testing.")
 
         # Clean up MongoDB and restore download script
@@ -134,10 +116,7 @@ class TestSearchSystem(unittest.TestCase):
     def test_single_word_query(self):
         print("Testing single word query directly with C++ library...")
         query = "book"
-        query_bytes = query.encode('utf-8')
-        result_list_ptr = self.lib.boolean_search(query_bytes)
-        search_results_ids = parse_doc_list(result_list_ptr)
-        self.lib.free_doc_list(result_list_ptr) # Free C++ list memory
+        search_results_ids = self.index.search(query)
 
         self.assertGreater(len(search_results_ids), 0)
         print(f"Direct search results for \"{query}\": {search_results_ids}")
@@ -145,10 +124,7 @@ class TestSearchSystem(unittest.TestCase):
     def test_multiple_word_query(self):
         print("Testing multiple word query (AND logic) directly with C++ library...")
         query = "the book"
-        query_bytes = query.encode('utf-8')
-        result_list_ptr = self.lib.boolean_search(query_bytes)
-        search_results_ids = parse_doc_list(result_list_ptr)
-        self.lib.free_doc_list(result_list_ptr) # Free C++ list memory
+        search_results_ids = self.index.search(query)
 
         self.assertGreater(len(search_results_ids), 0)
         # With AND logic, the number of results should be <= total documents (5)
@@ -159,10 +135,7 @@ class TestSearchSystem(unittest.TestCase):
     def test_no_results_query(self):
         print("Testing query with no expected results directly with C++ library...")
         query = "nonexistentwordxyz123"
-        query_bytes = query.encode('utf-8')
-        result_list_ptr = self.lib.boolean_search(query_bytes)
-        search_results_ids = parse_doc_list(result_list_ptr)
-        self.lib.free_doc_list(result_list_ptr) # Free C++ list memory
+        search_results_ids = self.index.search(query)
 
         self.assertEqual(len(search_results_ids), 0)
         print(f"Direct search results for \"{query}\": {search_results_ids}")
@@ -170,10 +143,7 @@ class TestSearchSystem(unittest.TestCase):
     def test_empty_query(self):
         print("Testing empty query directly with C++ library...")
         query = ""
-        query_bytes = query.encode('utf-8')
-        result_list_ptr = self.lib.boolean_search(query_bytes)
-        search_results_ids = parse_doc_list(result_list_ptr)
-        self.lib.free_doc_list(result_list_ptr) # Free C++ list memory
+        search_results_ids = self.index.search(query)
 
         self.assertEqual(len(search_results_ids), 0) # Empty query should return no results
         print(f"Direct search results for \"{query}\": {search_results_ids}")
@@ -184,10 +154,7 @@ class TestSearchSystem(unittest.TestCase):
         # Assuming "the" is in all documents, and "book" is in most.
         # Let's try to find documents with "the" but NOT "book".
         query = "the NOT book"
-        query_bytes = query.encode('utf-8')
-        result_list_ptr = self.lib.boolean_search(query_bytes)
-        search_results_ids = parse_doc_list(result_list_ptr)
-        self.lib.free_doc_list(result_list_ptr) # Free C++ list memory
+        search_results_ids = self.index.search(query)
 
         # We expect fewer documents than just "the", and possibly 0 if "book" is in all "the" documents.
         # Given the sample documents are books, it's highly likely "book" is in all of them.
@@ -195,5 +162,276 @@ class TestSearchSystem(unittest.TestCase):
         self.assertEqual(len(search_results_ids), 0)
         print(f"Direct search results for \"{query}\": {search_results_ids}")
 
+    def test_query_case_folding(self):
+        print("Testing query case folding directly with C++ library...")
+        exact_ids = self.index.search("book")
+        self.assertGreater(len(exact_ids), 0)
+        self.assertEqual(self.index.search("BOOK"), exact_ids)
+        self.assertEqual(self.index.search("Book"), exact_ids)
+        print(f"Direct search results for \"BOOK\": {exact_ids}")
+
+    def test_wildcard_query(self):
+        print("Testing wildcard queries directly with C++ library...")
+        exact_ids = self.index.search("book")
+
+        # A prefix pattern expands to a union that contains the exact term's documents.
+        prefix_ids = self.index.search("boo*")
+        self.assertTrue(set(exact_ids).issubset(set(prefix_ids)))
+
+        suffix_ids = self.index.search("*ook")
+        self.assertTrue(set(exact_ids).issubset(set(suffix_ids)))
+
+        missing_ids = self.index.search("nonexistentwordxyz*")
+        self.assertEqual(len(missing_ids), 0)
+        print(f"Direct search results for \"boo*\": {prefix_ids}, \"*ook\": {suffix_ids}")
+
+    def test_fuzzy_query(self):
+        print("Testing fuzzy query directly with C++ library...")
+        exact_ids = self.index.search("book")
+
+        # "bok" is one deletion away from "book".
+        fuzzy_ids = self.index.search("bok~1")
+        self.assertTrue(set(exact_ids).issubset(set(fuzzy_ids)))
+
+        missing_ids = self.index.search("nonexistentwordxyz123~")
+        self.assertEqual(len(missing_ids), 0)
+        print(f"Direct search results for \"bok~1\": {fuzzy_ids}")
+
+    def test_suggest_terms(self):
+        print("Testing term suggestions directly with C++ library...")
+        suggestions = [(suggestion["term"], suggestion["distance"]) for suggestion in self.index.suggest("bokk", 2, 5)]
+
+        self.assertIn(("book", 1), suggestions)
+        distances = [distance for _, distance in suggestions]
+        self.assertEqual(distances, sorted(distances))
+        print(f"Suggestions for \"bokk\": {suggestions}")
+
+    def test_batch_search(self):
+        print("Testing batch search directly with C++ library...")
+        queries = ["book", "the book", "the NOT book", "boo*", "bok~1", "nonexistentwordxyz", "", "book -nonexistentwordxyz"]
+        expected_results = [self.index.search(query) for query in queries]
+
+        self.assertEqual(self.index.search_batch(queries), expected_results)
+        self.assertEqual(self.index.search_batch(queries, num_threads=1), expected_results)
+        self.assertEqual(self.index.search_batch([]), [])
+        print(f"Batch search results: {expected_results}")
+
+    def test_external_index_build(self):
+        print("Testing external-memory index build directly with C++ library...")
+        queries = ["book", "the book", "the NOT book", "boo*", "bok~1"]
+        expected_results = self.index.search_batch(queries)
+
+        with tempfile.TemporaryDirectory() as index_dir:
+            index_path = os.path.join(index_dir, "index.bin")
+            # A tiny budget forces several sorted runs and a k-way merge.
+            self.assertTrue(self.index.open_index_writer(index_path, memory_budget_mb=0.001))
+            for doc_id, document in enumerate(self.collection.find({})):
+                if "content" in document:
+                    self.index.add_document(doc_id, document["content"])
+            term_count = self.index.close_index_writer()
+
+            self.assertEqual(term_count, self.index.term_count())
+            self.assertGreater(self.index.index_run_count(), 1)
+            self.assertEqual(os.listdir(index_dir), ["index.bin"])
+
+            # Loading the same postings again leaves the in-memory index unchanged.
+            self.assertEqual(self.index.load_index(index_path), term_count)
+            self.assertEqual(self.index.search_batch(queries), expected_results)
+        print(f"External index built with {term_count} terms")
+
+    def test_snippet_highlight(self):
+        print("Testing snippet generation from the document store...")
+        query = "book"
+        search_results_ids = self.index.search(query)
+        self.assertGreater(len(search_results_ids), 0)
+
+        snippet = self.index.snippet(query, search_results_ids[0], 200, "[", "]")
+        self.assertIsNotNone(snippet)
+
+        self.assertRegex(snippet.lower(), r"\[book")
+        self.assertLessEqual(len(snippet), 200 + len("......") + 2 * snippet.count("["))
+        print(f"Snippet for \"{query}\" in document {search_results_ids[0]}: {snippet}")
+
+
+class TestSmallIndex(unittest.TestCase):
+    # Indexes a few hand-written documents, so these tests need neither
+    # MongoDB nor the downloaded collection.
+
+    def setUp(self):
+        self.index = Index()
+
+    def tearDown(self):
+        # Normalization flags are process-wide; later tests expect the defaults.
+        self.index.set_normalization()
+        self.index.close()
+
+    def test_russian_case_folding_and_stemming(self):
+        print("Testing case folding and stemming of Russian words...")
+        self.index.add_document(0, "На полке стоят старые книги.")
+        self.index.add_document(1, "The book is on the shelf.")
+
+        self.assertEqual(self.index.search("книги"), [0])
+        self.assertEqual(self.index.search("КНИГА"), [0])
+        self.assertEqual(self.index.search("Книгами полке"), [0])
+        # Fuzzy distances count letters, not UTF-8 bytes: "р" and "н" differ
+        # in both of their bytes but are a single substitution.
+        self.assertEqual(self.index.search("криги~1"), [0])
+        print(f"Direct search results for \"КНИГА\": {self.index.search('КНИГА')}")
+
+    def test_diacritic_stripping(self):
+        print("Testing diacritic stripping...")
+        self.index.set_normalization(strip_diacritics=True)
+        self.index.add_document(0, "A naïve résumé written in a CAFÉ")
+        self.index.add_document(1, "Plain text without accents")
+
+        for query in ("cafe", "Café", "CAFÉ", "resume", "naive résumé"):
+            self.assertEqual(self.index.search(query), [0], query)
+        print(f"Direct search results for \"cafe\": {self.index.search('cafe')}")
+
+    def test_suggestion_surface_form(self):
+        print("Testing that suggestions show an indexed word instead of its stem...")
+        self.index.add_document(0, "Philosophies of philosophy")
+        suggestions = self.index.suggest("philosofy", 2, 1)
+
+        self.assertEqual(suggestions[0]["term"], "philosophi")
+        self.assertEqual(suggestions[0]["surface"], "philosophy")
+        print(f"Suggestions for \"philosofy\": {suggestions}")
+
+    def test_wildcard_prefix_of_whole_word(self):
+        print("Testing that a whole word followed by * finds that word...")
+        self.index.add_document(0, "philosophy books about running and studies")
+        self.index.add_document(1, "A runway")
+
+        for word in ("philosophy", "books", "running", "studies"):
+            exact_ids = self.index.search(word)
+            self.assertEqual(exact_ids, [0], word)
+            self.assertTrue(set(self.index.search(word + "*")) >= set(exact_ids), word)
+        self.assertEqual(self.index.search("runw*"), [1])
+        print(f"Direct search results for \"philosophy*\": {self.index.search('philosophy*')}")
+
+    def test_batch_search_shared_clauses(self):
+        print("Testing batch search with clauses shared between queries...")
+        for doc_id in range(50):
+            self.index.add_document(doc_id, f"common {'even' if doc_id % 2 == 0 else 'odd'} number{doc_id}")
+        queries = ["common", "even", "common NOT even", "odd common", "numb*", "evem~1", "number7"] * 30
+        expected_results = [self.index.search(query) for query in queries]
+
+        self.assertEqual(self.index.search_batch(queries, num_threads=4), expected_results)
+        print(f"Batch search results for \"common NOT even\": {expected_results[2]}")
+
+    def test_posting_list_containers(self):
+        print("Testing boolean queries over array and bitmap posting containers...")
+        # Doc ids share a container per 65536 ids; the first container gets
+        # more than 4096 documents per term, so it is stored as a bitmap.
+        doc_ids = list(range(12000)) + list(range(65536, 65536 + 3000)) + [200000, 200003]
+        words = {
+            "alpha": lambda doc_id: doc_id % 2 == 0,
+            "beta": lambda doc_id: doc_id % 3 == 0,
+            "unionleft": lambda doc_id: doc_id % 5 == 0,
+            "unionright": lambda doc_id: doc_id % 7 == 0,
+        }
+        for doc_id in doc_ids:
+            self.index.add_document(doc_id, " ".join(["common"] + [word for word, has in words.items() if has(doc_id)]))
+
+        def docs_with(word):
+            return {doc_id for doc_id in doc_ids if words[word](doc_id)}
+        expected = {
+            "alpha": docs_with("alpha"),
+            "alpha beta": docs_with("alpha") & docs_with("beta"),
+            "alpha -beta": docs_with("alpha") - docs_with("beta"),
+            "common NOT alpha": set(doc_ids) - docs_with("alpha"),
+            "union*": docs_with("unionleft") | docs_with("unionright"),
+            "union* -alpha beta": ((docs_with("unionleft") | docs_with("unionright")) - docs_with("alpha")) & docs_with("beta"),
+        }
+        self.assertGreater(len(docs_with("alpha") & set(range(65536))), 4096)
+        for query, expected_ids in expected.items():
+            self.assertEqual(self.index.search(query), sorted(expected_ids), query)
+        self.assertEqual(self.index.search_batch(list(expected)), [sorted(ids) for ids in expected.values()])
+        print(f"Result sizes: {[(query, len(ids)) for query, ids in expected.items()]}")
+
+    def test_external_index_multi_level_merge(self):
+        print("Testing an external index build with more runs than one merge can open...")
+        documents = [f"common word{doc_id % 50} group{doc_id % 7} item{doc_id}" for doc_id in range(300)]
+        queries = ["common", "word3", "group2 word9", "common -group1", "word1*", "grup3~1", "item299"]
+        for doc_id, text in enumerate(documents):
+            self.index.add_document(doc_id, text)
+        expected_results = self.index.search_batch(queries)
+        expected_term_count = self.index.term_count()
+        self.index.close()
+
+        self.index = Index()
+        with tempfile.TemporaryDirectory() as index_dir:
+            index_path = os.path.join(index_dir, "index.bin")
+            # About 100 bytes of budget flushes a run after every document,
+            # more than the 128 runs a single merge pass opens at once.
+            self.assertTrue(self.index.open_index_writer(index_path, memory_budget_mb=0.0001))
+            for doc_id, text in enumerate(documents):
+                self.index.add_document(doc_id, text)
+            term_count = self.index.close_index_writer()
+
+            self.assertGreater(self.index.index_run_count(), 128)
+            self.assertEqual(term_count, expected_term_count)
+            self.assertEqual(os.listdir(index_dir), ["index.bin"])
+            self.assertEqual(self.index.load_index(index_path), term_count)
+            self.assertEqual(self.index.search_batch(queries), expected_results)
+        print(f"External index built from {self.index.index_run_count()} runs with {term_count} terms")
+
+    def test_external_index_abort(self):
+        print("Testing that an unfinished external index build leaves the previous index alone...")
+        with tempfile.TemporaryDirectory() as index_dir:
+            index_path = os.path.join(index_dir, "index.bin")
+            self.assertTrue(self.index.open_index_writer(index_path))
+            self.index.add_document(0, "first build")
+            term_count = self.index.close_index_writer()
+
+            self.assertTrue(self.index.open_index_writer(index_path, memory_budget_mb=0.0001))
+            for doc_id in range(10):
+                self.index.add_document(doc_id, f"second build number{doc_id}")
+            self.index.close()
+
+            self.assertEqual(os.listdir(index_dir), ["index.bin"])
+            self.index = Index()
+            self.assertEqual(self.index.load_index(index_path), term_count)
+            self.assertEqual(self.index.search("first"), [0])
+
+    def test_external_index_failed_run(self):
+        print("Testing that a run that cannot be written fails the external index build...")
+        with tempfile.TemporaryDirectory() as index_dir:
+            index_path = os.path.join(index_dir, "index.bin")
+            self.assertTrue(self.index.open_index_writer(index_path))
+            self.index.add_document(0, "first build")
+            term_count = self.index.close_index_writer()
+
+            # A directory in place of a run file makes that run unwritable.
+            os.mkdir(index_path + ".run1")
+            self.assertTrue(self.index.open_index_writer(index_path, memory_budget_mb=0.0001))
+            for doc_id in range(4):
+                self.index.add_document(doc_id, f"common number{doc_id}")
+            self.assertEqual(self.index.close_index_writer(), -1)
+
+            self.assertEqual(sorted(os.listdir(index_dir)), ["index.bin", "index.bin.run1"])
+            self.index.close()
+            self.index = Index()
+            self.assertEqual(self.index.load_index(index_path), term_count)
+            self.assertEqual(self.index.search("first"), [0])
+            self.assertEqual(self.index.search("common"), [])
+
+    def test_snippet_highlights_expanded_terms(self):
+        print("Testing that wildcard and fuzzy snippets highlight the words they matched...")
+        with tempfile.TemporaryDirectory() as doc_store_dir:
+            doc_store_path = os.path.join(doc_store_dir, "doc_store.bin")
+            self.index.open_doc_store_writer(doc_store_path)
+            self.index.add_document(0, "alpha " * 200 + "The zebras graze. " + "omega " * 200)
+            self.index.add_document(1, "")
+            self.index.close_doc_store_writer()
+            self.assertTrue(self.index.open_doc_store(doc_store_path))
+
+            for query in ("zeb*", "zebr~1"):
+                snippet = self.index.snippet(query, 0, 80, "[", "]")
+                self.assertIn("[zebras]", snippet)
+                print(f"Snippet for \"{query}\": {snippet}")
+            # Empty documents are not stored.
+            self.assertIsNone(self.index.snippet("alpha", 1))
+
 if __name__ == '__main__':
     unittest.main()